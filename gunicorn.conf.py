@@ -0,0 +1,42 @@
+"""
+Gunicorn production profile for swiggy_project.
+
+    gunicorn swiggy_project.wsgi:application
+
+For ASGI, run uvicorn workers under the same profile:
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn swiggy_project.asgi:application
+
+Every setting can be overridden with the environment variables below.
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'swiggy_project.settings')
+# Serve SQLite in WAL mode so reads are not blocked by a write (see settings.DATABASES).
+os.environ.setdefault('SWIGGY_SQLITE_WAL', '1')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# Import the application once in the master so workers fork with it loaded.
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before workers fork.
+    from swiggy.warmup import warmup
+    warmup(connect_db=False)
+
+
+def post_worker_init(worker):
+    # Database connections are opened per worker, never inherited across fork.
+    from swiggy.warmup import warm_connections
+    warm_connections()
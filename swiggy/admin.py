@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, Restaurant
+from .models import User, Restaurant, Job
 # Register your models here.
 admin.site.register(User)
-admin.site.register(Restaurant)
\ No newline at end of file
+admin.site.register(Restaurant)
+admin.site.register(Job)
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SwiggyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'swiggy'
+
+    def ready(self):
+        # Register job functions so enqueue() and the run_jobs worker can find them.
+        from . import tasks  # noqa: F401
@@ -0,0 +1,125 @@
+import hashlib
+import hmac
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password, verify_password
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from rest_framework.exceptions import APIException
+
+DEFAULT_AUTH = {
+    # Seconds a successful username/password check is remembered; 0 disables the cache.
+    "CREDENTIAL_CACHE_TTL": 60,
+    # Threads hashing passwords; hashlib releases the GIL, so this scales with cores.
+    "HASH_WORKERS": os.cpu_count() or 1,
+    # Hashes allowed to run or wait at once before new logins are turned away.
+    "HASH_QUEUE": 4 * (os.cpu_count() or 1),
+    # Nice value of the hashing threads (Linux). A login flood then takes CPU
+    # left over by other requests instead of slowing every endpoint; 0 disables.
+    "HASH_NICE": 10,
+}
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = "Too many logins in progress, retry shortly."
+    default_code = "hashing_busy"
+
+
+def auth_settings():
+    return {**DEFAULT_AUTH, **getattr(settings, "SWIGGY_AUTH", {})}
+
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = auth_settings()
+                _slots = threading.BoundedSemaphore(config["HASH_QUEUE"])
+                _pool = ThreadPoolExecutor(max_workers=config["HASH_WORKERS"], thread_name_prefix="swiggy-hash",
+                                           initializer=_lower_priority, initargs=(config["HASH_NICE"],))
+    return _pool, _slots
+
+def _lower_priority(nice):
+    # On Linux the priority of a thread id applies to that thread alone.
+    if nice and sys.platform.startswith("linux"):
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+
+def reset_pool():
+    """Drop the hashing pool so the next call picks up changed settings."""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = _slots = None
+
+def offload(func, *args):
+    """Run a CPU-bound hashing call on the bounded pool, or raise HashingBusy if it is full."""
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        return pool.submit(func, *args).result()
+    finally:
+        slots.release()
+
+def hash_password(password):
+    return offload(make_password, password)
+
+
+def _credential_key(username, password):
+    # Keyed with SECRET_KEY so the cache never holds anything derived from the password alone.
+    digest = hmac.new(settings.SECRET_KEY.encode(), f"{username}\0{password}".encode(), hashlib.sha256).hexdigest()
+    return f"swiggy:auth:{digest}"
+
+def _hash_fingerprint(encoded):
+    # Changes whenever the stored hash does, which invalidates cached checks after a password change.
+    return salted_hmac("swiggy.auth.credential", encoded).hexdigest()
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend with a short-lived credential cache and off-thread hashing.
+
+    The user row is always read on the request thread, so a cached check is
+    only honoured while the stored password hash and ``is_active`` are unchanged.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            user = None
+        if user is None or not self.user_can_authenticate(user):
+            # Hash anyway so unknown and inactive users take as long as wrong passwords.
+            hash_password(password)
+            return None
+
+        ttl = auth_settings()["CREDENTIAL_CACHE_TTL"]
+        key = _credential_key(username, password)
+        if ttl and cache.get(key) == _hash_fingerprint(user.password):
+            return user
+
+        is_correct, must_update = offload(verify_password, password, user.password)
+        if not is_correct:
+            return None
+        if must_update:
+            # Transparent rehash when the hasher or its cost settings changed.
+            user.password = hash_password(password)
+            user.save(update_fields=["password"])
+        if ttl:
+            cache.set(key, _hash_fingerprint(user.password), ttl)
+        return user
@@ -0,0 +1,25 @@
+import time
+from django.core.cache import cache
+
+# Cached data is stored under a key that includes a version number. Writers
+# bump the version instead of deleting the data, so a rebuild that read the
+# database before a write can only store its result under a key nobody reads.
+
+
+def current(key, cached=None):
+    """The version stored under ``key``, taken from ``cached`` (a get_many() result) when it holds it."""
+    version = (cached or {}).get(key) or cache.get(key)
+    if version is None:
+        # A lost version restarts from the clock, never from a value used before.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key) or time.time_ns()
+    return version
+
+def bump(key):
+    """Move ``key`` to a new version and return it."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
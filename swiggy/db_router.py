@@ -0,0 +1,104 @@
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+REPLICA_ALIAS = "replica"
+# The pin is kept in the cache under the user, so token clients that drop
+# cookies stay pinned too. Browsers also get a signed cookie, which still pins
+# them if the cache entry is culled or evicted while the replica lags.
+PIN_COOKIE = "swiggy_primary"
+PIN_SALT = "swiggy.db_router.pin"
+DEFAULT_REPLICA = {
+    "ENABLED": True,
+    "STICKY_SECONDS": 5,
+}
+
+_use_replica = ContextVar("swiggy_use_replica", default=False)
+
+
+def replica_settings():
+    return {**DEFAULT_REPLICA, **getattr(settings, "SWIGGY_REPLICA", {})}
+
+def replica_name(path):
+    """Read-only SQLite URI for a database file, as used by the ``replica`` alias."""
+    return f"file:{path}?mode=ro"
+
+def replica_available():
+    # Under test the replica mirrors the default database; routing to it would
+    # open a second connection that cannot see the test's uncommitted rows.
+    if REPLICA_ALIAS not in settings.DATABASES:
+        return False
+    return connections[REPLICA_ALIAS].settings_dict["NAME"] != connections["default"].settings_dict["NAME"]
+
+def _pin_key(user_pk):
+    return f"swiggy:replica:pin:{user_pk}"
+
+def pin_to_primary(response, user):
+    """Keep the user's reads on the primary for a while so they see their own writes."""
+    seconds = replica_settings()["STICKY_SECONDS"]
+    cache.set(_pin_key(user.pk), True, seconds)
+    response.set_signed_cookie(PIN_COOKIE, str(user.pk), salt=PIN_SALT, max_age=seconds, httponly=True, samesite="Lax")
+
+def is_pinned(request):
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated):
+        return False
+    if cache.get(_pin_key(user.pk)):
+        return True
+    # max_age is checked against the signature's timestamp, so a client
+    # holding on to the cookie cannot stay pinned past STICKY_SECONDS.
+    pinned = request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_SALT,
+                                       max_age=replica_settings()["STICKY_SECONDS"])
+    return pinned == str(user.pk)
+
+
+class ReadReplicaRouter:
+    """Send reads to the replica only inside views marked with ``@read_replica``."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return REPLICA_ALIAS
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def read_replica(view):
+    """Run a read-only view's queries against the replica, unless the user wrote recently."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replica_settings()["ENABLED"] or not replica_available() or is_pinned(request):
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class ReplicaPinningMiddleware:
+    """Pin users to the primary after a successful write request."""
+
+    UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # DRF authenticates inside the view and copies the user back onto the request.
+        user = getattr(request, "user", None)
+        if request.method in self.UNSAFE_METHODS and response.status_code < 400 and user and user.is_authenticated:
+            pin_to_primary(response, user)
+        return response
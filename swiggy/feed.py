@@ -0,0 +1,128 @@
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from . import cache_versions
+from .models import Restaurant
+
+CATEGORIES = [value for value, _ in Restaurant.CATEGORY_CHOICES]
+DEFAULT_FEED = {
+    # Restaurants served per category.
+    "SIZE": 50,
+    # Extra entries kept so restaurants dropping out can be replaced without a rebuild.
+    "BUFFER": 25,
+    # Seconds a feed is kept. The generation check below keeps feeds current on
+    # backends with an atomic incr (Redis, local memory); the expiry bounds how
+    # long a lost update can be served where incr is not atomic (file cache).
+    "TIMEOUT": 3600,
+}
+
+
+def feed_settings():
+    return {**DEFAULT_FEED, **getattr(settings, "SWIGGY_FEED", {})}
+
+def _key(category):
+    return f"swiggy:feed:{category}"
+
+def _generation_key(category):
+    return f"swiggy:feed:{category}:generation"
+
+def _entry(restaurant):
+    return {
+        "id": restaurant.id,
+        "restaurant_name": restaurant.restaurant_name,
+        "category": restaurant.category,
+        "rating": restaurant.rating,
+        "order_count": restaurant.order_count,
+        "last_ordered_at": restaurant.last_ordered_at.isoformat() if restaurant.last_ordered_at else None,
+    }
+
+def _rank(entry):
+    # Best rating first, then most ordered, then most recently ordered.
+    last = datetime.fromisoformat(entry["last_ordered_at"]).timestamp() if entry["last_ordered_at"] else 0
+    return (-entry["rating"], -entry["order_count"], -last, entry["id"])
+
+
+# Every change to a category bumps its generation, and a stored feed records the
+# generation it was built or merged for. A feed whose generation is no longer
+# current is treated as missing, so a build that read the database before a
+# change, or a merge that lost a race, can only store a feed nobody serves.
+
+def _generation(category, cached=None):
+    return cache_versions.current(_generation_key(category), cached)
+
+def _store(category, generation, complete, entries):
+    cache.set(_key(category), {"generation": generation, "complete": complete, "entries": entries},
+              feed_settings()["TIMEOUT"])
+
+
+def build(category, generation=None):
+    config = feed_settings()
+    if generation is None:
+        generation = _generation(category)
+    restaurants = (Restaurant.objects.filter(category=category, is_open=True)
+                   .order_by("-rating", "-order_count", F("last_ordered_at").desc(nulls_last=True), "id")
+                   [:config["SIZE"] + config["BUFFER"]])
+    entries = [_entry(r) for r in restaurants]
+    # A short list holds every open restaurant in the category, so any of them may be merged in later.
+    _store(category, generation, len(entries) < config["SIZE"] + config["BUFFER"], entries)
+    return entries
+
+def _current(category, cached):
+    feed = cached.get(_key(category))
+    generation = _generation(category, cached)
+    if feed is None or feed["generation"] != generation:
+        return build(category, generation)
+    return feed["entries"]
+
+def get_feed(category):
+    return _current(category, cache.get_many([_key(category), _generation_key(category)]))
+
+def get_feeds(categories):
+    """Feeds for several categories with a single cache round trip when they are warm."""
+    cached = cache.get_many([k for c in categories for k in (_key(c), _generation_key(c))])
+    return {c: _current(c, cached) for c in categories}
+
+def invalidate(categories=CATEGORIES):
+    for category in categories:
+        cache_versions.bump(_generation_key(category))
+    cache.delete_many([_key(c) for c in categories])
+
+def refresh_restaurants(restaurant_ids):
+    """Re-rank the given restaurants inside their cached category feeds.
+
+    Only the changed entries move; the feed is rebuilt from the database only
+    when removals leave fewer than SIZE entries.
+    """
+    restaurants = list(Restaurant.objects.filter(id__in=restaurant_ids))
+    for category in {r.category for r in restaurants}:
+        _merge(category, [r for r in restaurants if r.category == category])
+
+def _merge(category, restaurants):
+    config = feed_settings()
+    capacity = config["SIZE"] + config["BUFFER"]
+    # Bump first: from here on any feed stored for an older generation, by a
+    # concurrent build or merge, is ignored by readers.
+    generation = cache_versions.bump(_generation_key(category))
+    feed = cache.get(_key(category))
+    # Only the feed of the generation just replaced can be patched; anything
+    # else missed an earlier change and is left for the next read to rebuild.
+    if feed is None or feed["generation"] != generation - 1:
+        return
+    ids = {r.id for r in restaurants}
+    complete = feed["complete"]
+    # An incomplete feed only knows the restaurants ranked up to its tail;
+    # anything that now ranks below it may be beaten by ones it does not hold.
+    cutoff = None if complete or not feed["entries"] else _rank(feed["entries"][-1])
+    entries = [e for e in feed["entries"] if e["id"] not in ids]
+    for restaurant in restaurants:
+        entry = _entry(restaurant)
+        if restaurant.is_open and (cutoff is None or _rank(entry) <= cutoff):
+            entries.append(entry)
+    entries.sort(key=_rank)
+    if len(entries) > capacity:
+        entries, complete = entries[:capacity], False
+    if not complete and len(entries) < config["SIZE"]:
+        cache.delete(_key(category))
+    else:
+        _store(category, generation, complete, entries)
@@ -0,0 +1,101 @@
+import math
+from django.db.models import Q
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_PRECISION = 9
+
+
+def encode(lat, lng, precision=MAX_PRECISION):
+    """Geohash of a point; each extra character narrows the cell roughly 32 times."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def neighbourhood(lat, lng, precision):
+    """The cell containing the point and its eight neighbours."""
+    dlat, dlng = cell_size(precision)
+    cells = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            cell_lat = min(90.0, max(-90.0, lat + i * dlat))
+            cell_lng = (lng + j * dlng + 180.0) % 360.0 - 180.0
+            cells.add(encode(cell_lat, cell_lng, precision))
+    return cells
+
+def covered_radius_km(lat, precision):
+    """Distance from a point that its 3x3 neighbourhood is guaranteed to cover."""
+    dlat, dlng = cell_size(precision)
+    # Anything outside the block is a full cell of latitude away, or a full cell
+    # of longitude away at a latitude no nearer the pole than the block's edge.
+    bottom = math.floor((lat + 90.0) / dlat) * dlat - 90.0 - dlat
+    poleward = min(90.0, max(abs(bottom), abs(bottom + 3 * dlat)))
+    across = 2 * math.asin(math.cos(math.radians(poleward)) * math.sin(math.radians(dlng) / 2))
+    return min(dlat * KM_PER_DEGREE, across * EARTH_RADIUS_KM)
+
+def prefix_range(prefix):
+    """Bounds for ``prefix <= geohash < upper``; unlike LIKE, a range can use the index on SQLite."""
+    return prefix, prefix + "{"  # "{" sorts right after "z", the last geohash character
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def nearest(queryset, lat, lng, k, start_precision=6, **exact):
+    """The ``k`` rows of ``queryset`` closest to the point, as (distance_km, row) pairs.
+
+    Searches the 3x3 geohash neighbourhood of the point, widening to coarser
+    cells until at least ``k`` rows fall inside the radius that neighbourhood
+    is guaranteed to cover, so the answer is exact without scanning the table.
+    Candidates are read as bare coordinates; only the winners are loaded.
+
+    ``exact`` column filters (e.g. ``category="lunch"``) are repeated inside each
+    cell's range so a composite ``(column, geohash)`` index serves it. Passed to
+    ``queryset.filter()`` instead, SQLite would pick the column's own index and
+    scan every row with that value.
+    """
+    for precision in range(start_precision, 0, -1):
+        found = _closest(_within_cells(queryset, neighbourhood(lat, lng, precision), exact), lat, lng)
+        radius = covered_radius_km(lat, precision)
+        if sum(1 for distance, _ in found[:k] if distance <= radius) >= k:
+            break
+    else:
+        # Fewer than k rows anywhere near: fall back to every row with coordinates.
+        found = _closest(queryset.filter(**exact).exclude(geohash=""), lat, lng)
+    found = found[:k]
+    rows = queryset.in_bulk([pk for _, pk in found])
+    return [(distance, rows[pk]) for distance, pk in found]
+
+def _within_cells(queryset, cells, exact):
+    condition = Q()
+    for cell in sorted(cells):
+        low, high = prefix_range(cell)
+        condition |= Q(**exact, geohash__gte=low, geohash__lt=high)
+    return queryset.filter(condition)
+
+def _closest(queryset, lat, lng):
+    candidates = queryset.values_list("pk", "latitude", "longitude")
+    return sorted((haversine_km(lat, lng, a, b), pk) for pk, a, b in candidates)
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the work factor taken from ``SWIGGY_AUTH["PBKDF2_ITERATIONS"]``.
+
+    It keeps Django's ``pbkdf2_sha256`` algorithm name, so existing hashes still
+    verify and are rehashed on the next login whenever the iteration count changes.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "SWIGGY_AUTH", {}).get("PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
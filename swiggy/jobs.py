@@ -0,0 +1,152 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = {
+    # Run jobs in-process right after the enqueuing transaction commits instead of storing them.
+    "EAGER": False,
+    # queue name -> jobs a worker runs at once from that queue.
+    "QUEUES": {"default": 4},
+    "BACKOFF_BASE": 2.0,
+    "BACKOFF_MAX": 3600.0,
+    # RUNNING jobs untouched for this long are assumed lost with their worker and retried.
+    "STALE_AFTER": 600,
+    # Seconds between the runner refreshing locked_at of the jobs it is running;
+    # must stay well below STALE_AFTER.
+    "HEARTBEAT": 60,
+    # Seconds DONE jobs are kept, and with them their idempotency keys.
+    "KEEP_DONE": 7 * 24 * 3600,
+}
+
+TASKS = {}
+
+
+def jobs_settings():
+    return {**DEFAULT_JOBS, **getattr(settings, "SWIGGY_JOBS", {})}
+
+def task(name, queue="default", max_attempts=5):
+    """Register a function as a job; its payload is passed as keyword arguments."""
+    def decorator(func):
+        TASKS[name] = (func, queue, max_attempts)
+        return func
+    return decorator
+
+def enqueue(name, payload=None, queue=None, idempotency_key=None, delay=0, max_attempts=None):
+    """Store a job to run after the current transaction commits.
+
+    Returns the Job, or None in eager mode. Jobs are rows in the same database,
+    so a rolled-back request never leaves a job behind.
+    """
+    func, default_queue, default_attempts = TASKS[name]
+    payload = payload or {}
+    if jobs_settings()["EAGER"]:
+        transaction.on_commit(lambda: func(**payload))
+        return None
+    fields = {
+        "queue": queue or default_queue, "name": name, "payload": payload,
+        "max_attempts": max_attempts or default_attempts,
+        "run_at": timezone.now() + timedelta(seconds=delay),
+    }
+    if idempotency_key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            job, _ = Job.objects.get_or_create(idempotency_key=idempotency_key, defaults=fields)
+    except IntegrityError:
+        # Lost a race with another request enqueuing the same key.
+        job = Job.objects.get(idempotency_key=idempotency_key)
+    return job
+
+def backoff(attempts):
+    config = jobs_settings()
+    delay = min(config["BACKOFF_MAX"], config["BACKOFF_BASE"] ** attempts)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(queue, limit):
+    """Atomically mark up to ``limit`` due jobs of ``queue`` as RUNNING and return them.
+
+    Each job is claimed with a conditional UPDATE, so concurrent workers never
+    run the same job twice.
+    """
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    due = (Job.objects.filter(queue=queue, status="PENDING", run_at__lte=now)
+           .order_by("run_at").values_list("id", flat=True)[:limit])
+    claimed = [job_id for job_id in due
+               if Job.objects.filter(id=job_id, status="PENDING")
+               .update(status="RUNNING", locked_at=now, attempts=F("attempts") + 1)]
+    return list(Job.objects.filter(id__in=claimed).order_by("run_at"))
+
+def _finish(job, **fields):
+    # Every claim increments attempts, so a row with the attempts this worker
+    # claimed has not been handed to another worker since; if it has, that
+    # worker now owns the outcome.
+    if not Job.objects.filter(id=job.id, attempts=job.attempts).update(locked_at=None, updated_at=timezone.now(), **fields):
+        logger.warning("Job %s (%s) was claimed again while running; its outcome is left to the new run", job.id, job.name)
+
+def run(job):
+    """Run a claimed job and record the outcome; failures are retried with exponential backoff."""
+    try:
+        func, _, _ = TASKS[job.name]
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%s) failed permanently:\n%s", job.id, job.name, error)
+            _finish(job, status="FAILED", last_error=error)
+        else:
+            retry_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            _finish(job, status="PENDING", run_at=retry_at, last_error=error)
+    else:
+        _finish(job, status="DONE")
+
+def run_in_worker(job):
+    # Worker threads outlive requests, so nothing else recycles their connections.
+    try:
+        run(job)
+    finally:
+        close_old_connections()
+
+def init_worker_process():
+    # A forked worker must not use (or close) database connections inherited from
+    # its parent; forget them so each child opens its own.
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+def run_by_id(job_id):
+    # Entry point for process pools, where Job instances are not passed across.
+    run_in_worker(Job.objects.get(id=job_id))
+
+def heartbeat(job_ids):
+    """Refresh locked_at of jobs still running, so requeue_stale leaves them alone."""
+    return Job.objects.filter(id__in=job_ids, status="RUNNING").update(locked_at=timezone.now())
+
+def requeue_stale():
+    """Retry RUNNING jobs whose worker stopped sending heartbeats; fail those out of attempts.
+
+    A job that keeps killing its worker is claimed, and counted, once per crash,
+    so it stops here after max_attempts instead of looping forever.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status="RUNNING", locked_at__lt=now - timedelta(seconds=jobs_settings()["STALE_AFTER"]))
+    exhausted = dict(stale.filter(attempts__gte=F("max_attempts")).values_list("id", "name"))
+    for job_id, name in exhausted.items():
+        logger.error("Job %s (%s) failed permanently: its worker was lost on the last attempt", job_id, name)
+    failed = stale.filter(id__in=exhausted).update(
+        status="FAILED", last_error="Worker lost while running the job", locked_at=None, updated_at=now)
+    return failed + stale.update(status="PENDING", locked_at=None, updated_at=now)
+
+def prune():
+    """Delete DONE jobs older than KEEP_DONE; returns the count."""
+    cutoff = timezone.now() - timedelta(seconds=jobs_settings()["KEEP_DONE"])
+    return Job.objects.filter(status="DONE", updated_at__lt=cutoff).delete()[0]
@@ -0,0 +1,64 @@
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from django.core.management import call_command
+from django.db import connections
+from swiggy.db_router import REPLICA_ALIAS, replica_name
+
+
+@contextmanager
+def temporary_database():
+    """Point the default database at a throwaway, migrated SQLite file.
+
+    Benchmarks must never write to the real database, and a file (rather than
+    the in-memory test database) can be shared with forked worker processes.
+    """
+    conn = connections["default"]
+    original = conn.settings_dict["NAME"]
+    fd, path = tempfile.mkstemp(prefix="swiggy-bench-", suffix=".sqlite3")
+    os.close(fd)
+    connections.close_all()
+    conn.settings_dict["NAME"] = path
+    # Keep the read replica, when configured, pointed at the same file.
+    replica = connections[REPLICA_ALIAS] if REPLICA_ALIAS in connections.settings else None
+    if replica is not None:
+        original_replica = replica.settings_dict["NAME"]
+        replica.settings_dict["NAME"] = replica_name(path)
+    try:
+        call_command("migrate", verbosity=0, interactive=False)
+        # As under gunicorn: replica readers must not block on the benchmark's writes.
+        with conn.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        yield path
+    finally:
+        connections.close_all()
+        conn.settings_dict["NAME"] = original
+        if replica is not None:
+            replica.settings_dict["NAME"] = original_replica
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
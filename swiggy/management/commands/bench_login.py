@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from swiggy import auth
+from swiggy.models import User
+from ._bench import temporary_database
+
+
+class Command(BaseCommand):
+    help = "Benchmark successful logins per second per core, with and without the credential cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=2 * (os.cpu_count() or 1), help="Concurrent login clients.")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario.")
+        parser.add_argument("--iterations", type=int, default=settings.SWIGGY_AUTH["PBKDF2_ITERATIONS"],
+                            help="PBKDF2 iterations to hash the benchmark users with.")
+        parser.add_argument("--users", type=int, default=50)
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        auth_config = {**settings.SWIGGY_AUTH, "PBKDF2_ITERATIONS": options["iterations"]}
+        # Measure hashing, not the login throttle or the load shedder.
+        overrides = {"SWIGGY_THROTTLE": {"RATES": {}}, "SWIGGY_LOAD_SHEDDING": {"ENABLED": False}}
+        report = {"cores": cores, "threads": options["threads"], "pbkdf2_iterations": options["iterations"]}
+        with temporary_database(), override_settings(**overrides):
+            with override_settings(SWIGGY_AUTH=auth_config):
+                password = make_password("bench-pass-123")
+                User.objects.bulk_create([User(username=f"bench_user_{i}", password=password) for i in range(options["users"])])
+            for name, ttl in (("uncached", 0), ("cached", 60)):
+                with override_settings(SWIGGY_AUTH={**auth_config, "CREDENTIAL_CACHE_TTL": ttl}):
+                    auth.reset_pool()
+                    if ttl:
+                        self.prime(options["users"])
+                    logins = self.run(options["threads"], options["duration"], options["users"])
+                rate = logins / options["duration"]
+                report[name] = {"logins_per_sec": round(rate, 1), "logins_per_sec_per_core": round(rate / cores, 1)}
+            auth.reset_pool()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def prime(self, users):
+        # Steady state for the cached run: every user has logged in recently.
+        client = Client(HTTP_HOST="localhost")
+        for i in range(users):
+            client.post("/api/login/", {"username": f"bench_user_{i}", "password": "bench-pass-123"})
+
+    def run(self, threads, duration, users):
+        counts = [0] * threads
+        deadline = time.perf_counter() + duration
+
+        def client_loop(n):
+            client = Client(HTTP_HOST="localhost")
+            i = n
+            while time.perf_counter() < deadline:
+                response = client.post("/api/login/", {"username": f"bench_user_{i % users}", "password": "bench-pass-123"})
+                if response.status_code == 200:
+                    counts[n] += 1
+                i += threads
+            connections.close_all()
+
+        workers = [threading.Thread(target=client_loop, args=(n,)) for n in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return sum(counts)
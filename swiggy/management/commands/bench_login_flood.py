@@ -0,0 +1,127 @@
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, RequestFactory, override_settings
+from rest_framework.authtoken.models import Token
+from swiggy import auth
+from swiggy.models import User, Restaurant, MenuItem, Cart, CartItem
+from swiggy.throttling import get_store, load_state
+from ._bench import temporary_database, summarize
+
+PROBE_PATH = "/api/view_cart/"
+
+
+def _flood(overrides, threads, interval, ready, stop, results):
+    # Runs in a forked process standing in for the worker that takes the flood,
+    # so the probing worker only shares the CPU with it, not the GIL.
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    with override_settings(**overrides):
+        auth.reset_pool()
+        get_store().clear()
+        load_state.reset()
+        statuses = Counter()
+        flooders = [threading.Thread(target=_flood_thread, args=(n, interval, stop, statuses)) for n in range(threads)]
+        for t in flooders:
+            t.start()
+        ready.set()
+        for t in flooders:
+            t.join()
+        auth.reset_pool()
+    results.put(dict(statuses))
+
+def _flood_thread(n, interval, stop, statuses):
+    # Call the WSGI handler directly: the test client's own bookkeeping would be
+    # client-side work charged to the server.
+    application = WSGIHandler()
+    body = json.dumps({"username": "bench_customer", "password": "wrong"}).encode()
+    template = RequestFactory().post("/api/login/", body, content_type="application/json", HTTP_HOST="localhost").environ
+    start_response = lambda status, headers: statuses.update([int(status.split()[0])])
+    i = 0
+    next_at = time.perf_counter()
+    while not stop.wait(max(0.0, next_at - time.perf_counter())):
+        next_at += interval
+        # Spread the flood over many source addresses so only the endpoint bucket can catch it.
+        environ = {**template, "wsgi.input": io.BytesIO(body), "REMOTE_ADDR": f"10.{n}.{i // 250 % 250}.{i % 250}"}
+        b"".join(application(environ, start_response))
+        i += 1
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ("Measure p99 latency of an unrelated endpoint while /api/login/ is flooded, with and without protection, "
+            "and fail if the protected p99 strays from the no-flood p99.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flood-threads", type=int, default=8)
+        parser.add_argument("--flood-rate", type=float, default=100.0, help="Offered login attempts per second, across all threads.")
+        parser.add_argument("--max-in-flight", type=int, default=os.cpu_count() or 1,
+                            help="SWIGGY_LOAD_SHEDDING MAX_IN_FLIGHT for the protected run.")
+        parser.add_argument("--probes", type=int, default=1000, help="Probe requests per scenario.")
+        parser.add_argument("--max-slowdown", type=float, default=2.0,
+                            help="Largest allowed ratio of protected to no-flood probe p99.")
+
+    def handle(self, *args, **options):
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+        interval = options["flood_threads"] / options["flood_rate"]
+        unprotected = {
+            "SWIGGY_THROTTLE": {**settings.SWIGGY_THROTTLE, "RATES": {}},
+            "SWIGGY_LOAD_SHEDDING": {**settings.SWIGGY_LOAD_SHEDDING, "ENABLED": False},
+            # Every attempt hashes, at full priority.
+            "SWIGGY_AUTH": {**settings.SWIGGY_AUTH, "HASH_QUEUE": 10 ** 6, "HASH_NICE": 0},
+        }
+        protected = {"SWIGGY_LOAD_SHEDDING": {**settings.SWIGGY_LOAD_SHEDDING, "MAX_IN_FLIGHT": options["max_in_flight"]}}
+        with temporary_database():
+            token = self.seed()
+            report = {
+                "no_flood": self.run_scenario(token, 0, interval, {}, options["probes"]),
+                "flood_unprotected": self.run_scenario(token, options["flood_threads"], interval, unprotected, options["probes"]),
+                "flood_protected": self.run_scenario(token, options["flood_threads"], interval, protected, options["probes"]),
+            }
+        slowdown = report["flood_protected"]["probe"]["p99_ms"] / report["no_flood"]["probe"]["p99_ms"]
+        report["protected_p99_slowdown"] = round(slowdown, 2)
+        self.stdout.write(json.dumps(report, indent=2))
+        if slowdown > options["max_slowdown"]:
+            raise CommandError(f"Protected probe p99 is {slowdown:.2f}x the no-flood p99 (limit {options['max_slowdown']}x)")
+
+    def seed(self):
+        owner = User.objects.create_user(username="bench_owner", password="bench-pass-123", role="RESTAURANT_OWNER")
+        restaurant = Restaurant.objects.create(owner=owner, restaurant_name="Bench Kitchen", restaurant_address="1 Bench Road",
+                                               rest_phonenum="0000000000", rest_email="bench@example.com", category="lunch")
+        items = MenuItem.objects.bulk_create([MenuItem(restaurant=restaurant, name=f"Dish {i}", price=100 + i, food_type="veg") for i in range(10)])
+        customer = User.objects.create_user(username="bench_customer", password="bench-pass-123")
+        cart = Cart.objects.create(user=customer)
+        CartItem.objects.bulk_create([CartItem(cart=cart, menu_item=item, quantity=1) for item in items])
+        return Token.objects.create(user=customer).key
+
+    def run_scenario(self, token, flood_threads, interval, overrides, probes):
+        ctx = multiprocessing.get_context("fork")
+        ready, stop, results = ctx.Event(), ctx.Event(), ctx.Queue()
+        flooder = None
+        if flood_threads:
+            # Never carry an open connection across fork.
+            connections.close_all()
+            flooder = ctx.Process(target=_flood, args=(overrides, flood_threads, interval, ready, stop, results))
+            flooder.start()
+            ready.wait()
+            time.sleep(0.5)
+        client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Token {token}")
+        samples = []
+        for _ in range(probes):
+            start = time.perf_counter()
+            client.get(PROBE_PATH)
+            samples.append(time.perf_counter() - start)
+        statuses = {}
+        if flooder is not None:
+            stop.set()
+            statuses = results.get()
+            flooder.join()
+        return {"probe": summarize(samples), "login_statuses": statuses}
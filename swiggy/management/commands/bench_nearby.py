@@ -0,0 +1,73 @@
+import json
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from swiggy import geo
+from swiggy.models import Restaurant
+from ._bench import temporary_database, summarize
+
+CATEGORIES = [value for value, _ in Restaurant.CATEGORY_CHOICES]
+
+
+class Command(BaseCommand):
+    help = "Benchmark k-nearest open restaurant queries over a large synthetic table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1_000_000, help="Restaurants to generate.")
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--center", type=float, nargs=2, default=(12.97, 77.59), metavar=("LAT", "LNG"))
+        parser.add_argument("--spread", type=float, default=2.0, help="Half-width in degrees of the generated area.")
+        parser.add_argument("--verify", type=int, default=20, help="Queries to check against a full scan.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        lat0, lng0 = options["center"]
+        spread = options["spread"]
+        point = lambda: (lat0 + rng.uniform(-spread, spread), lng0 + rng.uniform(-spread, spread))
+
+        with temporary_database():
+            started = time.perf_counter()
+            self.populate(options["count"], point, rng)
+            load_seconds = time.perf_counter() - started
+
+            queries = [(point(), rng.choice(CATEGORIES + [None])) for _ in range(options["queries"])]
+            samples = []
+            for (lat, lng), category in queries:
+                start = time.perf_counter()
+                geo.nearest(self.queryset(), lat, lng, options["k"], **self.exact(category))
+                samples.append(time.perf_counter() - start)
+
+            for (lat, lng), category in queries[:options["verify"]]:
+                self.verify(category, lat, lng, options["k"])
+
+        report = {"restaurants": options["count"], "k": options["k"], "load_seconds": round(load_seconds, 1),
+                  "knn": summarize(samples), "verified": min(options["verify"], options["queries"])}
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def queryset(self):
+        return Restaurant.objects.filter(is_open=True)
+
+    def exact(self, category):
+        return {"category": category} if category else {}
+
+    def populate(self, count, point, rng, batch=20_000):
+        for start in range(0, count, batch):
+            rows = []
+            for i in range(start, min(count, start + batch)):
+                lat, lng = point()
+                # bulk_create skips save(), so derive the geohash here.
+                rows.append(Restaurant(restaurant_name=f"Bench {i}", restaurant_address="", rest_phonenum="", rest_email="",
+                                       category=rng.choice(CATEGORIES), is_open=rng.random() < 0.8,
+                                       latitude=lat, longitude=lng, geohash=geo.encode(lat, lng)))
+            with transaction.atomic():
+                Restaurant.objects.bulk_create(rows, batch_size=1000)
+
+    def verify(self, category, lat, lng, k):
+        got = [r.id for _, r in geo.nearest(self.queryset(), lat, lng, k, **self.exact(category))]
+        rows = self.queryset().filter(**self.exact(category)).values_list("id", "latitude", "longitude")
+        expected = [i for _, i in sorted((geo.haversine_km(lat, lng, a, b), i) for i, a, b in rows)[:k]]
+        if got != expected:
+            raise CommandError(f"k-NN mismatch at ({lat}, {lng}): {got} != {expected}")
@@ -0,0 +1,80 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+from swiggy.models import User, Restaurant, MenuItem, Cart, Order, OrderItem
+from ._bench import temporary_database, summarize
+
+
+class Command(BaseCommand):
+    help = "Measure checkout and admin listing latency when both run at once, with and without the read replica."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkout-threads", type=int, default=4)
+        parser.add_argument("--reader-threads", type=int, default=4)
+        parser.add_argument("--orders", type=int, default=100, help="Existing orders the admin listing returns.")
+        parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each scenario.")
+
+    def handle(self, *args, **options):
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+        with temporary_database():
+            admin, customers, items = self.seed(options["checkout_threads"], options["orders"])
+            report = {}
+            for name, enabled in (("primary_only", False), ("replica", True)):
+                with override_settings(SWIGGY_REPLICA={**settings.SWIGGY_REPLICA, "ENABLED": enabled}):
+                    report[name] = self.run_scenario(admin, customers, items, options["reader_threads"], options["seconds"])
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, customers, orders):
+        owner = User.objects.create_user(username="bench_owner", password="bench-pass-123", role="RESTAURANT_OWNER")
+        restaurant = Restaurant.objects.create(owner=owner, restaurant_name="Bench Kitchen", restaurant_address="1 Bench Road",
+                                               rest_phonenum="0000000000", rest_email="bench@example.com", category="lunch")
+        items = MenuItem.objects.bulk_create([MenuItem(restaurant=restaurant, name=f"Dish {i}", price=100 + i, food_type="veg") for i in range(10)])
+        buyers = [User.objects.create_user(username=f"bench_customer_{n}", password="bench-pass-123") for n in range(customers)]
+        Cart.objects.bulk_create([Cart(user=user) for user in buyers])
+        history = Order.objects.bulk_create([Order(user=buyers[n % customers], restaurant=restaurant, total_amount=300) for n in range(orders)])
+        OrderItem.objects.bulk_create([OrderItem(order=order, menu_item=items[k], quantity=1, price=100) for order in history for k in range(3)])
+        admin = User.objects.create_user(username="bench_admin", password="bench-pass-123", role="ADMIN")
+        tokens = lambda users: [Token.objects.create(user=u).key for u in users]
+        return tokens([admin])[0], tokens(buyers), [item.id for item in items]
+
+    def run_scenario(self, admin, customers, items, readers, seconds):
+        stop = threading.Event()
+        statuses = Counter()
+        checkouts, reads = [], []
+        threads = [threading.Thread(target=self.checkout, args=(token, items, stop, checkouts, statuses)) for token in customers]
+        threads += [threading.Thread(target=self.read, args=(admin, stop, reads, statuses)) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        return {"checkout": summarize(checkouts), "admin_list_orders": summarize(reads), "statuses": dict(statuses)}
+
+    def checkout(self, token, items, stop, samples, statuses):
+        client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Token {token}")
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.post("/api/add_to_cart/", {"menu_item": items[i % len(items)], "quantity": 1})
+            response = client.post("/api/place_order/")
+            samples.append(time.perf_counter() - start)
+            statuses[f"place_order {response.status_code}"] += 1
+            i += 1
+        connections.close_all()
+
+    def read(self, token, stop, samples, statuses):
+        client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Token {token}")
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.get("/api/admin/orders/")
+            samples.append(time.perf_counter() - start)
+            statuses[f"admin_list_orders {response.status_code}"] += 1
+        connections.close_all()
@@ -0,0 +1,107 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+from rest_framework.authtoken.models import Token
+from swiggy.models import User, Restaurant, MenuItem
+from ._bench import temporary_database
+
+BENCH_PATH = "/api/all_menu/"
+
+COLD_START_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+from swiggy_project.wsgi import application
+loaded = time.perf_counter()
+if sys.argv[1] == "warm":
+    from swiggy.warmup import warmup
+    warmup()
+warmed = time.perf_counter()
+from django.test import RequestFactory
+environ = RequestFactory().get(sys.argv[2], HTTP_HOST="localhost", HTTP_AUTHORIZATION="Token " + sys.argv[3]).environ
+b"".join(application(environ, lambda status, headers: None))
+first = time.perf_counter()
+environ = RequestFactory().get(sys.argv[2], HTTP_HOST="localhost", HTTP_AUTHORIZATION="Token " + sys.argv[3]).environ
+b"".join(application(environ, lambda status, headers: None))
+second = time.perf_counter()
+print(json.dumps({"import_ms": (loaded - start) * 1000, "warmup_ms": (warmed - loaded) * 1000,
+                  "first_request_ms": (first - warmed) * 1000, "second_request_ms": (second - first) * 1000}))
+"""
+
+
+def _environ(token):
+    return RequestFactory().get(BENCH_PATH, HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Token {token}").environ
+
+def _worker(token, duration, start_at, results):
+    from swiggy.warmup import warmup
+    from swiggy_project.wsgi import application
+    warmup()
+    while time.time() < start_at:
+        time.sleep(0.001)
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        b"".join(application(_environ(token), lambda status, headers: None))
+        done += 1
+    results.put(done)
+
+
+class Command(BaseCommand):
+    help = "Benchmark worker cold-start time and WSGI throughput scaling from 1 to N processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--duration", type=float, default=3.0, help="Seconds per throughput run.")
+        parser.add_argument("--menu-items", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with temporary_database() as db_path:
+            token = self.seed(options["menu_items"])
+            report = {
+                "cold_start": {mode: self.cold_start(db_path, token, mode) for mode in ("cold", "warm")},
+                "throughput": self.throughput(token, options["max_workers"], options["duration"]),
+            }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, menu_items):
+        owner = User.objects.create_user(username="bench_owner", password="bench-pass-123", role="RESTAURANT_OWNER")
+        restaurant = Restaurant.objects.create(owner=owner, restaurant_name="Bench Kitchen", restaurant_address="1 Bench Road",
+                                               rest_phonenum="0000000000", rest_email="bench@example.com", category="lunch")
+        MenuItem.objects.bulk_create([MenuItem(restaurant=restaurant, name=f"Dish {i}", price=100 + i, food_type="veg") for i in range(menu_items)])
+        customer = User.objects.create_user(username="bench_customer", password="bench-pass-123")
+        return Token.objects.create(user=customer).key
+
+    def cold_start(self, db_path, token, mode):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "swiggy_project.settings"), SWIGGY_DB_NAME=db_path)
+        started = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT, mode, BENCH_PATH, token],
+                             cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+        timings = {k: round(v, 3) for k, v in json.loads(out.stdout).items()}
+        timings["process_total_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return timings
+
+    def throughput(self, token, max_workers, duration):
+        ctx = multiprocessing.get_context("fork")
+        runs = []
+        baseline = None
+        for n in range(1, max_workers + 1):
+            # Never carry an open connection across fork.
+            connections.close_all()
+            results = ctx.Queue()
+            start_at = time.time() + 1.0
+            procs = [ctx.Process(target=_worker, args=(token, duration, start_at, results)) for _ in range(n)]
+            for p in procs:
+                p.start()
+            total = sum(results.get() for _ in procs)
+            for p in procs:
+                p.join()
+            rps = total / duration
+            baseline = baseline or rps
+            runs.append({"workers": n, "requests_per_sec": round(rps, 1), "scaling": round(rps / baseline, 2)})
+        return runs
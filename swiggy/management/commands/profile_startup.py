@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROBE_PATH = "/api/all_menu/"
+
+# Each probe prints {"ready_ms": ..., "first_request_ms": ...} on stdout.
+PROBES = {
+    "manage": """
+import json, sys, time
+start = time.perf_counter()
+from django.core.management import execute_from_command_line
+execute_from_command_line(["manage.py", "check", "--verbosity", "0"])
+ready = time.perf_counter()
+print(json.dumps({"ready_ms": (ready - start) * 1000, "first_request_ms": None}))
+""",
+    "wsgi": """
+import json, sys, time
+start = time.perf_counter()
+from swiggy_project.wsgi import application
+ready = time.perf_counter()
+from django.test import RequestFactory
+environ = RequestFactory().get(sys.argv[1], HTTP_HOST="localhost").environ
+b"".join(application(environ, lambda status, headers: None))
+done = time.perf_counter()
+print(json.dumps({"ready_ms": (ready - start) * 1000, "first_request_ms": (done - ready) * 1000}))
+""",
+    "asgi": """
+import asyncio, json, sys, time
+start = time.perf_counter()
+from swiggy_project.asgi import application
+ready = time.perf_counter()
+scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+         "path": sys.argv[1], "raw_path": sys.argv[1].encode(), "root_path": "", "query_string": b"",
+         "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 0), "server": ("localhost", 80)}
+messages = [{"type": "http.request", "body": b"", "more_body": False}]
+async def receive():
+    if messages:
+        return messages.pop()
+    await asyncio.Event().wait()
+async def send(message):
+    pass
+asyncio.run(application(scope, receive, send))
+done = time.perf_counter()
+print(json.dumps({"ready_ms": (ready - start) * 1000, "first_request_ms": (done - ready) * 1000}))
+""",
+}
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Report import-time breakdown and time-to-first-request for the manage.py, WSGI and ASGI entry points."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entrypoint", choices=sorted(PROBES), action="append",
+                            help="Entry point to profile (repeatable). Defaults to all.")
+        parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list.")
+        parser.add_argument("--max-ms", type=float, default=1500.0,
+                            help="Fail if startup plus first request exceeds this many milliseconds.")
+        parser.add_argument("--forbid", action="append", default=None,
+                            help="Module that must not be imported at startup (repeatable). Defaults to paypalrestsdk.")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+
+    def handle(self, *args, **options):
+        forbidden = options["forbid"] or ["paypalrestsdk"]
+        report = {name: self.profile(name, options["top"]) for name in options["entrypoint"] or sorted(PROBES)}
+
+        failures = []
+        for name, result in report.items():
+            total = result["ready_ms"] + (result["first_request_ms"] or 0)
+            if total > options["max_ms"]:
+                failures.append(f"{name}: {total:.1f}ms exceeds budget of {options['max_ms']:.1f}ms")
+            for module in forbidden:
+                if module in result["modules"]:
+                    failures.append(f"{name}: '{module}' is imported at startup")
+            del result["modules"]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for name, result in report.items():
+                self.write_report(name, result)
+        if failures:
+            raise CommandError("Startup regression:\n  " + "\n  ".join(failures))
+
+    def profile(self, name, top):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "swiggy_project.settings"))
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBES[name], PROBE_PATH],
+                             cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            raise CommandError(f"{name} probe failed:\n{out.stderr[-2000:]}")
+        timings = json.loads(out.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(out.stderr)
+        return {
+            "ready_ms": round(timings["ready_ms"], 3),
+            "first_request_ms": None if timings["first_request_ms"] is None else round(timings["first_request_ms"], 3),
+            "import_ms": round(sum(r[2] for r in rows if r[3] == 0) / 1000, 3),
+            "slowest_imports": [{"module": m, "cumulative_ms": c / 1000, "self_ms": s / 1000}
+                                for m, s, c, d in sorted(rows, key=lambda r: r[2], reverse=True)[:top]],
+            "modules": {r[0] for r in rows},
+        }
+
+    def write_report(self, name, result):
+        first = "n/a" if result["first_request_ms"] is None else f"{result['first_request_ms']:.1f}ms"
+        self.stdout.write(f"{name}: ready {result['ready_ms']:.1f}ms, first request {first}, imports {result['import_ms']:.1f}ms")
+        self.stdout.write(f"  {'cumulative':>12} {'self':>10}  module")
+        for row in result["slowest_imports"]:
+            self.stdout.write(f"  {row['cumulative_ms']:>10.1f}ms {row['self_ms']:>8.1f}ms  {row['module']}")
@@ -0,0 +1,84 @@
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from swiggy import jobs
+
+logger = logging.getLogger("swiggy.jobs")
+
+
+def log_crash(future):
+    # jobs.run records job failures itself; this only catches the runner breaking.
+    if future.exception() is not None:
+        logger.error("Job runner crashed", exc_info=future.exception())
+
+def parse_queues(values):
+    queues = {}
+    for value in values:
+        name, _, concurrency = value.partition(":")
+        try:
+            queues[name] = int(concurrency or 1)
+        except ValueError:
+            raise CommandError(f"Invalid --queue '{value}', expected NAME or NAME:CONCURRENCY")
+    return queues
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queue", action="append", default=[], metavar="NAME[:CONCURRENCY]",
+                            help="Queue to serve and how many of its jobs run at once (repeatable). Defaults to SWIGGY_JOBS['QUEUES'].")
+        parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when no job is due.")
+        parser.add_argument("--once", action="store_true", help="Run every due job, then exit.")
+
+    def handle(self, *args, **options):
+        queues = parse_queues(options["queue"]) or jobs.jobs_settings()["QUEUES"]
+        if options["pool"] == "process":
+            executor = ProcessPoolExecutor(max_workers=sum(queues.values()), mp_context=multiprocessing.get_context("fork"),
+                                           initializer=jobs.init_worker_process)
+            submit = lambda job: executor.submit(jobs.run_by_id, job.id)
+        else:
+            executor = ThreadPoolExecutor(max_workers=sum(queues.values()), thread_name_prefix="swiggy-job")
+            submit = lambda job: executor.submit(jobs.run_in_worker, job)
+
+        stop = threading.Event()
+        if not options["once"]:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+        self.stdout.write(f"Serving queues {queues} with a {options['pool']} pool")
+
+        # queue -> {future: job id} of the jobs this runner holds.
+        running = {queue: {} for queue in queues}
+        heartbeat = jobs.jobs_settings()["HEARTBEAT"]
+        next_maintenance = 0
+        ran = 0
+        try:
+            while not stop.is_set():
+                if time.monotonic() >= next_maintenance:
+                    jobs.heartbeat([job_id for held in running.values() for job_id in held.values()])
+                    jobs.requeue_stale()
+                    jobs.prune()
+                    next_maintenance = time.monotonic() + heartbeat
+                claimed = 0
+                for queue, limit in queues.items():
+                    running[queue] = {f: job_id for f, job_id in running[queue].items() if not f.done()}
+                    for job in jobs.claim(queue, limit - len(running[queue])):
+                        future = submit(job)
+                        future.add_done_callback(log_crash)
+                        running[queue][future] = job.id
+                        claimed += 1
+                ran += claimed
+                busy = any(running.values())
+                if options["once"] and not claimed and not busy:
+                    break
+                if not claimed:
+                    stop.wait(options["poll_interval"] if not busy else 0.05)
+        finally:
+            # Let claimed jobs finish so none are left RUNNING.
+            executor.shutdown(wait=True)
+        self.stdout.write(f"Ran {ran} job(s)")
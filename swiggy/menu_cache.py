@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from . import cache_versions
+
+# The menu is stored under a versioned key, see cache_versions.
+MENU_VERSION_KEY = "swiggy:menu:version"
+
+
+def _key(version):
+    return f"swiggy:menu:{version}"
+
+def get_menu(build):
+    """Return the serialized menu, calling ``build()`` to rebuild it on a miss."""
+    key = _key(cache_versions.current(MENU_VERSION_KEY))
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data)
+    return data
+
+def invalidate_menu():
+    cache_versions.bump(MENU_VERSION_KEY)
+
+def set_availability(item_ids, is_available):
+    """Patch ``is_available`` in the cached menu instead of rebuilding it.
+
+    The patched copy is added under the next version and then the version is
+    bumped, so readers move to it in one step. If another write bumps the
+    version in between, the bump lands past the patched copy and the next
+    read rebuilds.
+    """
+    version = cache_versions.current(MENU_VERSION_KEY)
+    data = cache.get(_key(version))
+    if data is not None:
+        item_ids = set(item_ids)
+        for item in data:
+            if item["id"] in item_ids:
+                item["is_available"] = is_available
+        cache.add(_key(version + 1), data)
+    invalidate_menu()
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swiggy', '0003_rename_restaurant_name_menuitem_restaurant_and_more'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='menuitem',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'name'), name='unique_menu_item_per_restaurant'),
+        ),
+    ]
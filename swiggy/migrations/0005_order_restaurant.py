@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_order_restaurant(apps, schema_editor):
+    # Orders placed before this migration may span restaurants; only link
+    # those whose items all come from a single restaurant.
+    Order = apps.get_model('swiggy', 'Order')
+    OrderItem = apps.get_model('swiggy', 'OrderItem')
+    restaurants = {}
+    for order_id, restaurant_id in OrderItem.objects.filter(menu_item__isnull=False).values_list('order_id', 'menu_item__restaurant_id'):
+        restaurants.setdefault(order_id, set()).add(restaurant_id)
+    for order_id, ids in restaurants.items():
+        if len(ids) == 1:
+            Order.objects.filter(id=order_id).update(restaurant_id=ids.pop())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swiggy', '0004_menuitem_unique_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='swiggy.restaurant'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'status', 'created_at'], name='order_restaurant_inbox_idx'),
+        ),
+        migrations.RunPython(backfill_order_restaurant, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:30
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_feed_stats(apps, schema_editor):
+    Order = apps.get_model('swiggy', 'Order')
+    Restaurant = apps.get_model('swiggy', 'Restaurant')
+    stats = Order.objects.filter(restaurant__isnull=False).values('restaurant').annotate(count=Count('id'), last=Max('created_at'))
+    for row in stats:
+        Restaurant.objects.filter(id=row['restaurant']).update(order_count=row['count'], last_ordered_at=row['last'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swiggy', '0006_restaurant_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='last_ordered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='order_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['category', '-rating', '-order_count'], name='restaurant_feed_idx'),
+        ),
+        migrations.RunPython(backfill_feed_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swiggy', '0008_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='order_user_history_idx'),
+        ),
+    ]
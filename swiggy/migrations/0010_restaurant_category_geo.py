@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swiggy', '0009_order_user_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['category', 'geohash'], name='restaurant_category_geo_idx'),
+        ),
+    ]
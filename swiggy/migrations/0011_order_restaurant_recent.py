@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('swiggy', '0010_restaurant_category_geo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', 'created_at'], name='order_restaurant_recent_idx'),
+        ),
+    ]
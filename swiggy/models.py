@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
+from . import geo
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -29,10 +31,36 @@ class Restaurant(models.Model):
     rest_email = models.EmailField(max_length=100)
     rating = models.FloatField(default=0)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
+    is_open = models.BooleanField(default=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Derived from latitude/longitude on save; prefix ranges on it drive the nearby search.
+    geohash = models.CharField(max_length=geo.MAX_PRECISION, blank=True, default="", db_index=True)
+    # Maintained by place_order for the home feed ranking.
+    order_count = models.PositiveIntegerField(default=0)
+    last_ordered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves the home feed ranking. Nearby searches filter on category too, but
+            # geo._within_cells puts it inside each cell range so they stay on the index below.
+            models.Index(fields=["category", "-rating", "-order_count"], name="restaurant_feed_idx"),
+            # Serves each geohash cell range of a nearby search within one category.
+            models.Index(fields=["category", "geohash"], name="restaurant_category_geo_idx"),
+        ]
 
     def __str__(self):
         return self.restaurant_name
 
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ""
+        if kwargs.get("update_fields") is not None and {"latitude", "longitude"} & set(kwargs["update_fields"]):
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"geohash"}
+        super().save(*args, **kwargs)
+
 class MenuItem(models.Model):
     FOOD_TYPE_CHOICES = [
         ('veg', "Veg"),
@@ -45,6 +73,11 @@ class MenuItem(models.Model):
     is_available = models.BooleanField(default=True)
     food_type = models.CharField(max_length=10, choices=FOOD_TYPE_CHOICES)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["restaurant", "name"], name="unique_menu_item_per_restaurant"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -72,10 +105,19 @@ class Order(models.Model):
         ("DELIVERED", "Delivered"),
     ]
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
+    # Denormalized from the order items so a restaurant's inbox is a single indexed lookup.
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.SET_NULL, null=True, blank=True, related_name="orders")
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default="PENDING")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["restaurant", "status", "created_at"], name="order_restaurant_inbox_idx"),
+            models.Index(fields=["restaurant", "created_at"], name="order_restaurant_recent_idx"),
+            models.Index(fields=["user", "-created_at"], name="order_user_history_idx"),
+        ]
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, null=True, blank=True)
@@ -94,3 +136,32 @@ class RatingReview(models.Model):
 
     def __str__(self):
         return f"{self.user} → {self.restaurant} : {self.rating}"
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+    queue = models.CharField(max_length=50, default="default")
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    # Enqueuing twice with the same key returns the existing job instead of adding one.
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["queue", "status", "run_at"], name="job_claim_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.queue}:{self.name} ({self.status})"
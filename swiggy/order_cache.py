@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_ORDER_HISTORY = {
+    # Keep the serialized form of DELIVERED orders in the cache.
+    "CACHE_DELIVERED": True,
+    # Seconds a payload is kept. Payloads embed the restaurant and menu item
+    # names, which can be edited without touching the order, and a read that
+    # raced invalidate() may store an old payload; the expiry bounds both.
+    "TIMEOUT": 24 * 3600,
+}
+
+
+def order_history_settings():
+    return {**DEFAULT_ORDER_HISTORY, **getattr(settings, "SWIGGY_ORDER_HISTORY", {})}
+
+def _key(order_id, restaurant_id):
+    # The restaurant becomes NULL when it is deleted, which moves the order to a new key.
+    return f"swiggy:order:{order_id}:{restaurant_id}"
+
+def get_many(orders):
+    """Cached payloads of the DELIVERED orders among ``orders``, keyed by order id."""
+    delivered = {o.id: _key(o.id, o.restaurant_id) for o in orders if o.status == "DELIVERED"}
+    if not delivered or not order_history_settings()["CACHE_DELIVERED"]:
+        return {}
+    cached = cache.get_many(list(delivered.values()))
+    return {i: cached[key] for i, key in delivered.items() if key in cached}
+
+def set_many(payloads):
+    """Store the payloads of DELIVERED orders; other statuses can still change."""
+    config = order_history_settings()
+    if not config["CACHE_DELIVERED"]:
+        return
+    cache.set_many({_key(p["id"], p["restaurant"]): p for p in payloads if p["status"] == "DELIVERED"}, config["TIMEOUT"])
+
+def invalidate(order):
+    cache.delete(_key(order.id, order.restaurant_id))
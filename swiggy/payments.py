@@ -0,0 +1,18 @@
+from functools import lru_cache
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def paypal():
+    """Import and configure the PayPal SDK on first use.
+
+    paypalrestsdk pulls in requests and pyOpenSSL, so loading it at import time
+    slows down every management command and test run that never takes a payment.
+    """
+    import paypalrestsdk
+    paypalrestsdk.configure({
+        "mode": settings.PAYPAL_MODE,
+        "client_id": settings.PAYPAL_CLIENT_ID,
+        "client_secret": settings.PAYPAL_CLIENT_SECRET
+    })
+    return paypalrestsdk
@@ -0,0 +1,164 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.utils.crypto import constant_time_compare
+
+DEFAULT_PROFILING = {
+    # Off by default; when off the middleware removes itself from the stack.
+    "ENABLED": False,
+    # "cprofile" writes .pstats files, "sample" writes collapsed stacks for flame graphs.
+    "MODE": "cprofile",
+    # Fraction of all requests profiled.
+    "SAMPLE_RATE": 0.0,
+    # Requests carrying this header with the token as its value are always profiled;
+    # an empty token disables the header trigger.
+    "HEADER": "X-Swiggy-Profile",
+    "TOKEN": "",
+    # Seconds between stack samples in "sample" mode.
+    "INTERVAL": 0.005,
+    # Only the newest MAX_FILES profiles are kept.
+    "DIRECTORY": os.path.join(tempfile.gettempdir(), "swiggy-profiles"),
+    "MAX_FILES": 100,
+}
+EXTENSIONS = {"cprofile": ".pstats", "sample": ".collapsed"}
+NAME_RE = re.compile(r"^[\w.-]+\.(pstats|collapsed)$")
+
+# One profiled request per process at a time: it bounds the overhead, and
+# cProfile cannot be enabled twice at once on newer Pythons.
+_active = threading.Lock()
+
+
+def profiling_settings():
+    return {**DEFAULT_PROFILING, **getattr(settings, "SWIGGY_PROFILING", {})}
+
+
+class StackSampler:
+    """Record the stack of one thread at a fixed interval from a background thread.
+
+    Unlike cProfile this adds no per-call overhead to the profiled thread, so it
+    is the safer choice for requests with many small function calls.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._target = None
+        self._thread = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="swiggy-profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, "w") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+class CProfiler:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path):
+        self.profile.dump_stats(path)
+
+
+def list_profiles():
+    """Saved profiles, newest first."""
+    directory = profiling_settings()["DIRECTORY"]
+    if not os.path.isdir(directory):
+        return []
+    entries = [e for e in os.scandir(directory) if e.is_file() and NAME_RE.match(e.name)]
+    entries.sort(key=lambda e: e.name, reverse=True)
+    return [{"name": e.name, "size": e.stat().st_size, "created_at": e.stat().st_mtime} for e in entries]
+
+def profile_path(name):
+    """Absolute path of a saved profile, or None for names outside the ring buffer."""
+    if not NAME_RE.match(name):
+        return None
+    path = os.path.join(profiling_settings()["DIRECTORY"], name)
+    return path if os.path.isfile(path) else None
+
+def save(profiler, request, elapsed_ms, mode):
+    """Write a finished profile into the ring buffer and drop the oldest beyond MAX_FILES."""
+    config = profiling_settings()
+    os.makedirs(config["DIRECTORY"], exist_ok=True)
+    slug = re.sub(r"[^\w]+", "_", request.path).strip("_")[:60] or "root"
+    # Names sort by time, so the ring buffer order is the lexical order.
+    name = f"{time.time_ns()}-{request.method}-{slug}-{round(elapsed_ms)}ms{EXTENSIONS[mode]}"
+    path = os.path.join(config["DIRECTORY"], name)
+    # Write aside and rename, so a download never sees a half-written file.
+    profiler.dump(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    for stale in list_profiles()[config["MAX_FILES"]:]:
+        try:
+            os.remove(os.path.join(config["DIRECTORY"], stale["name"]))
+        except FileNotFoundError:
+            pass
+    return name
+
+
+class ProfilingMiddleware:
+    """Profile selected requests: a share of all traffic, or those sent with the profiling header."""
+
+    def __init__(self, get_response):
+        config = profiling_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed()
+        if config["MODE"] not in EXTENSIONS:
+            raise ImproperlyConfigured(f"SWIGGY_PROFILING['MODE'] must be one of {sorted(EXTENSIONS)}")
+        self.get_response = get_response
+
+    def should_profile(self, request, config):
+        token = config["TOKEN"]
+        if token and constant_time_compare(request.headers.get(config["HEADER"], ""), token):
+            return True
+        return config["SAMPLE_RATE"] > 0 and random.random() < config["SAMPLE_RATE"]
+
+    def __call__(self, request):
+        config = profiling_settings()
+        if not self.should_profile(request, config) or not _active.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            mode = config["MODE"]
+            profiler = StackSampler(config["INTERVAL"]) if mode == "sample" else CProfiler()
+            started = time.perf_counter()
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+            response["X-Profile-Id"] = save(profiler, request, (time.perf_counter() - started) * 1000, mode)
+        finally:
+            _active.release()
+        return response
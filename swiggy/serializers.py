@@ -1,6 +1,7 @@
-from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import User, Restaurant, MenuItem, CartItem, RatingReview
+from rest_framework import serializers
+from . import auth
+from .models import User, Restaurant, MenuItem, CartItem, Order, OrderItem, RatingReview
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -9,13 +10,15 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'password', 'role', 'phone']
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data["username"],
-            email=validated_data["email"],
-            password=validated_data["password"],
+        # Same as create_user(), but the password is hashed on the bounded hashing pool.
+        user = User(
+            username=User.normalize_username(validated_data["username"]),
+            email=User.objects.normalize_email(validated_data["email"]),
+            password=auth.hash_password(validated_data["password"]),
             role=validated_data.get("role", "CUSTOMER"),
             phone=validated_data.get("phone")
         )
+        user.save()
         return user
 
 class UserLoginSerializer(serializers.Serializer):
@@ -23,7 +26,7 @@ class UserLoginSerializer(serializers.Serializer):
     password = serializers.CharField()
 
     def validate(self, data):
-        user = authenticate(username=data.get("username"), password=data.get("password"))
+        user = authenticate(self.context.get("request"), username=data.get("username"), password=data.get("password"))
         if not user:
             raise serializers.ValidationError("Invalid credentials")
         return {"user": user}
@@ -37,12 +40,36 @@ class RestaurantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Restaurant
         fields = "__all__"
+        read_only_fields = ['geohash', 'order_count', 'last_ordered_at']
+
+class NearbyRestaurantQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    k = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    category = serializers.ChoiceField(choices=Restaurant.CATEGORY_CHOICES, required=False)
+
+class FeedQuerySerializer(serializers.Serializer):
+    category = serializers.ChoiceField(choices=Restaurant.CATEGORY_CHOICES, required=False)
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(min_value=1, max_value=50, default=10)
 
 class MenuItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = MenuItem
         fields = "__all__"
 
+class MenuItemBulkSerializer(serializers.ModelSerializer):
+    """One row of a bulk menu upload; the restaurant is set by the view."""
+    class Meta:
+        model = MenuItem
+        fields = ['name', 'price', 'is_available', 'food_type']
+        # Rows are upserted on (restaurant, name), so an existing name is not an error.
+        validators = []
+
+class MenuAvailabilitySerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    is_available = serializers.BooleanField()
+
 class CartItemSerializer(serializers.ModelSerializer):
     menu_item_name = serializers.ReadOnlyField(source="menu_item.name")
     menu_item_price = serializers.ReadOnlyField(source="menu_item.price")
@@ -51,6 +78,31 @@ class CartItemSerializer(serializers.ModelSerializer):
         model = CartItem
         fields = ['id', 'menu_item', 'menu_item_name', 'menu_item_price', 'quantity', 'subtotal']
 
+class OrderItemSerializer(serializers.ModelSerializer):
+    menu_item_name = serializers.ReadOnlyField(source="menu_item.name")
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'menu_item', 'menu_item_name', 'quantity', 'price']
+
+class OrderSerializer(serializers.ModelSerializer):
+    user_name = serializers.ReadOnlyField(source="user.username")
+    items = OrderItemSerializer(many=True, read_only=True)
+    class Meta:
+        model = Order
+        fields = ['id', 'user', 'user_name', 'restaurant', 'status', 'total_amount', 'created_at', 'items']
+
+class OrderHistorySerializer(serializers.ModelSerializer):
+    restaurant_name = serializers.ReadOnlyField(source="restaurant.restaurant_name", default=None)
+    item_count = serializers.SerializerMethodField()
+    items = OrderItemSerializer(many=True, read_only=True)
+    class Meta:
+        model = Order
+        fields = ['id', 'restaurant', 'restaurant_name', 'status', 'total_amount', 'created_at', 'item_count', 'items']
+
+    def get_item_count(self, obj):
+        # Counted from the prefetched items, not with another query.
+        return sum(item.quantity for item in obj.items.all())
+
 class RatingReviewSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
     class Meta:
@@ -0,0 +1,7 @@
+from . import feed
+from .jobs import task
+
+
+@task("feed.refresh_restaurants", queue="feeds")
+def refresh_feed(restaurant_ids):
+    feed.refresh_restaurants(restaurant_ids)
@@ -1,3 +1,773 @@
-from django.test import TestCase
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth.hashers import make_password, verify_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.db import connection, transaction
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from . import auth, cache_versions, db_router, feed, geo, jobs, menu_cache, profiling, urls, views
+from .models import User, Restaurant, MenuItem, Cart, CartItem, Order, OrderItem, RatingReview, Job
+from .throttling import CacheBucketStore, get_store, load_state
 
-# Create your tests here.
+# Checked-in query and latency budgets per route. Query counts are asserted;
+# wall-clock latency varies between machines, so it is only reported. Regenerate
+# after an intended change with: SWIGGY_UPDATE_PERF_BASELINE=1 python manage.py test swiggy
+BASELINE_PATH = Path(__file__).with_name("perf_baseline.json")
+UPDATE_BASELINE = os.environ.get("SWIGGY_UPDATE_PERF_BASELINE") == "1"
+SIZES = (10, 1000)
+POINT = (12.97, 77.59)
+PASSWORD = "bench-pass-123"
+WRITE = re.compile(r'^(INSERT INTO|UPDATE|DELETE FROM) "(\w+)"')
+MULTI_ROW = re.compile(r"\), \(|IN \([^)]*,")
+
+
+def seed(size):
+    """Users, restaurants, menu items, cart items, orders and reviews, ``size`` of each."""
+    f = SimpleNamespace()
+    f.admin = User.objects.create_user(username="admin", password=PASSWORD, role="ADMIN")
+    f.owner = User.objects.create_user(username="owner", password=PASSWORD, role="RESTAURANT_OWNER")
+    f.customer = User.objects.create_user(username="customer", password=PASSWORD)
+    f.delivery = User.objects.create_user(username="delivery", password=PASSWORD, role="DELIVERY_PARTNER")
+    others = User.objects.bulk_create([User(username=f"user_{i}", password="!") for i in range(size)])
+
+    lat, lng = POINT
+    f.restaurant = Restaurant.objects.create(owner=f.owner, restaurant_name="Main Kitchen", restaurant_address="1 Main Road",
+                                             rest_phonenum="0000000000", rest_email="main@example.com", category="lunch",
+                                             latitude=lat, longitude=lng)
+    Restaurant.objects.bulk_create([
+        Restaurant(restaurant_name=f"Nearby {i}", restaurant_address="", rest_phonenum="", rest_email="", category="lunch",
+                   latitude=lat, longitude=lng, geohash=geo.encode(lat, lng))
+        for i in range(size)
+    ])
+    f.items = MenuItem.objects.bulk_create([
+        MenuItem(restaurant=f.restaurant, name=f"Dish {i}", price=100 + i, food_type="veg", is_available=i % 10 != 9)
+        for i in range(size)
+    ])
+    cart = Cart.objects.create(user=f.customer)
+    f.cart_items = CartItem.objects.bulk_create([CartItem(cart=cart, menu_item=item, quantity=2) for item in f.items])
+    f.orders = Order.objects.bulk_create([
+        Order(user=f.customer, restaurant=f.restaurant, total_amount=200, status="DELIVERED" if i == 0 else "PENDING")
+        for i in range(size)
+    ])
+    # The first order holds the whole menu, so routes reading one order see it grow too.
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, menu_item=f.items[(i + k) % size], quantity=1, price=100)
+        for i, order in enumerate(f.orders) for k in range(size if i == 0 else 2)
+    ])
+    RatingReview.objects.bulk_create([RatingReview(user=u, restaurant=f.restaurant, rating=4, comment="Fine") for u in others])
+    return f
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    SWIGGY_JOBS={"EAGER": False},
+)
+class SwiggyTestCase(TestCase):
+    """Local-memory cache, cheap password hashing and queued jobs, with caches and
+    throttle buckets emptied before each test. Set ``seed_size`` to get ``self.f``."""
+
+    seed_size = None
+
+    def setUp(self):
+        cache.clear()
+        get_store().clear()
+        load_state.reset()
+        if self.seed_size is not None:
+            self.f = seed(self.seed_size)
+
+
+def statements(sqls):
+    """Collapse the extra batches Django splits a bulk write into (SQLite allows 999
+    parameters per query), so only per-row queries make the count grow."""
+    kept, previous = [], None
+    for sql in sqls:
+        write = WRITE.match(sql)
+        shape = write.groups() if write and MULTI_ROW.search(sql) else None
+        if shape is None or shape != previous:
+            kept.append(sql)
+        previous = shape
+    return kept
+
+
+def saved_profile(f):
+    name = "1-GET-api_profile-1ms.pstats"
+    Path(profiling.profiling_settings()["DIRECTORY"], name).write_bytes(b"stats")
+    return name
+
+
+def fake_paypal():
+    payment = mock.Mock()
+    payment.create.return_value = True
+    payment.execute.return_value = True
+    payment.links = [SimpleNamespace(rel="approval_url", href="https://paypal.example/approve")]
+    sdk = mock.Mock()
+    sdk.Payment.return_value = payment
+    sdk.Payment.find.return_value = payment
+    return sdk
+
+
+# route name -> (user, method, path, data, expected status). Callables receive the seeded fixtures.
+SCENARIOS = {
+    "register": (None, "post", lambda f: reverse("register"),
+                 lambda f: {"username": "new_user", "email": "new@example.com", "password": PASSWORD}, 201),
+    "login": (None, "post", lambda f: reverse("login"), lambda f: {"username": "customer", "password": PASSWORD}, 200),
+    "profile": ("customer", "get", lambda f: reverse("profile"), None, 200),
+
+    "add_restaurant": ("owner", "post", lambda f: reverse("add_restaurant"),
+                       lambda f: {"restaurant_name": "Second Kitchen", "restaurant_address": "2 Main Road", "rest_phonenum": "1111111111",
+                                  "rest_email": "second@example.com", "category": "dinner"}, 201),
+    "add_menu": ("owner", "post", lambda f: reverse("add_menu"), lambda f: {"name": "New Dish", "price": "99.00", "food_type": "veg"}, 200),
+    "update_menu": ("owner", "patch", lambda f: reverse("update_menu", args=[f.items[0].id]), lambda f: {"price": "120.00"}, 200),
+    "update_menu_availability": ("owner", "patch", lambda f: reverse("update_menu_availability"),
+                                 lambda f: {"items": [i.id for i in f.items[:5]], "is_available": False}, 200),
+    "all_menu": ("customer", "get", lambda f: reverse("all_menu"), None, 200),
+    "delete_menu": ("owner", "delete", lambda f: reverse("delete_menu", args=[f.items[0].id]), None, 200),
+    "bulk_upsert_menu": ("owner", "post", lambda f: reverse("bulk_upsert_menu"),
+                         lambda f: {"items": [{"name": "Dish 0", "price": "90.00"}, {"name": "Brand New", "price": "50.00", "food_type": "veg"}]}, 200),
+    "search_restaurants": ("customer", "get", lambda f: reverse("search_restaurants") + "?restaurant_name=Main", None, 200),
+    "nearby_restaurants": ("customer", "get", lambda f: reverse("nearby_restaurants") + f"?lat={POINT[0]}&lng={POINT[1]}&k=5", None, 200),
+    "home_feed": ("customer", "get", lambda f: reverse("home_feed"), None, 200),
+
+    "add_to_cart": ("customer", "post", lambda f: reverse("add_to_cart"), lambda f: {"menu_item": f.items[0].id, "quantity": 1}, 200),
+    "remove_from_cart": ("customer", "post", lambda f: reverse("remove_from_cart"), lambda f: {"item_id": f.cart_items[0].id}, 200),
+    "view_cart": ("customer", "get", lambda f: reverse("view_cart"), None, 200),
+
+    "place_order": ("customer", "post", lambda f: reverse("place_order"), None, 200),
+    "reorder": ("customer", "post", lambda f: reverse("reorder", args=[f.orders[0].id]), None, 201),
+    "order_history": ("customer", "get", lambda f: reverse("order_history"), None, 200),
+    "restaurant_orders": ("owner", "get", lambda f: reverse("restaurant_orders"), None, 200),
+
+    "rate_restaurant": ("customer", "post", lambda f: reverse("rate_restaurant", args=[f.restaurant.id]),
+                        lambda f: {"rating": 5, "comment": "Great"}, 200),
+    "restaurant_reviews": ("customer", "get", lambda f: reverse("restaurant_reviews", args=[f.restaurant.id]), None, 200),
+
+    "admin_list_users": ("admin", "get", lambda f: reverse("admin_list_users"), None, 200),
+    "admin_list_all_restaurants": ("admin", "get", lambda f: reverse("admin_list_all_restaurants"), None, 200),
+    "admin_update_restaurant": ("admin", "patch", lambda f: reverse("admin_update_restaurant", args=[f.restaurant.id]),
+                                lambda f: {"is_open": False}, 200),
+    "admin_delete_restaurant": ("admin", "delete", lambda f: reverse("admin_delete_restaurant", args=[f.restaurant.id]), None, 200),
+    "admin_list_orders": ("admin", "get", lambda f: reverse("admin_list_orders"), None, 200),
+    "admin_list_profiles": ("admin", "get", lambda f: reverse("admin_list_profiles"), None, 200),
+    "admin_download_profile": ("admin", "get", lambda f: reverse("admin_download_profile", args=[saved_profile(f)]), None, 200),
+
+    "delivery_accept_order": ("delivery", "post", lambda f: reverse("delivery_accept_order", args=[f.orders[1].id]), None, 200),
+    "delivery_update_status": ("delivery", "post", lambda f: reverse("delivery_update_status", args=[f.orders[1].id]),
+                               lambda f: {"status": "OUT_FOR_DELIVERY"}, 200),
+
+    "create_paypal_payment": ("customer", "post", lambda f: reverse("create_paypal_payment", args=[f.orders[0].id]), None, 200),
+    "execute_paypal_payment": ("customer", "get",
+                               lambda f: reverse("execute_paypal_payment", args=[f.orders[0].id]) + "?paymentId=PAY-1&PayerID=P1", None, 200),
+    "cancel_paypal_payment": ("customer", "get", lambda f: reverse("cancel_paypal_payment", args=[f.orders[0].id]), None, 200),
+}
+
+
+class QueryBudgetTests(SwiggyTestCase):
+    """Every route runs against small and large fixtures; its query count must not change
+    with the fixture size and must stay within the checked-in budget."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        cls.measured = {}
+        profiles = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(SWIGGY_PROFILING={"DIRECTORY": profiles}))
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINE and cls.measured:
+            # Latency is noisy across machines, so existing latency budgets are kept and
+            # new ones leave room for anything short of an order-of-magnitude regression.
+            budgets = {**cls.baseline, **{
+                route: {"queries": queries, "latency_ms": cls.baseline.get(route, {}).get("latency_ms", max(100, math.ceil(ms * 5)))}
+                for route, (queries, ms) in cls.measured.items()
+            }}
+            BASELINE_PATH.write_text(json.dumps(dict(sorted(budgets.items())), indent=2) + "\n")
+        super().tearDownClass()
+
+    def measure(self, route, size):
+        """Seed fixtures of ``size``, call the route once and roll everything back."""
+        user, method, path, data, expected = SCENARIOS[route]
+        with transaction.atomic():
+            f = seed(size)
+            cache.clear()
+            get_store().clear()
+            load_state.reset()
+            client = APIClient()
+            if user:
+                client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=getattr(f, user)).key}")
+            request = getattr(client, method)
+            with mock.patch("swiggy.views.paypal", fake_paypal), CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = request(path(f), data(f) if data else None, format="json")
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        self.assertEqual(response.status_code, expected, f"{route} at size {size}: {getattr(response, 'data', response)}")
+        return statements([q["sql"] for q in queries.captured_queries]), elapsed * 1000
+
+    def check_route(self, route):
+        (small, _), (large, ms) = (self.measure(route, size) for size in SIZES)
+        self.assertEqual(len(small), len(large), f"{route} runs {len(small)} queries for {SIZES[0]} rows but {len(large)} for {SIZES[1]}:\n"
+                         + "\n".join(large))
+        self.measured[route] = (len(large), ms)
+        if UPDATE_BASELINE:
+            return
+        budget = self.baseline.get(route)
+        self.assertIsNotNone(budget, f"{route} has no entry in {BASELINE_PATH.name}")
+        self.assertLessEqual(len(large), budget["queries"], f"{route} exceeds its query budget:\n" + "\n".join(large))
+        if ms > budget["latency_ms"]:
+            # Report only: a loaded machine must not fail the suite.
+            sys.stderr.write(f"\n{route} took {ms:.1f}ms, over its {budget['latency_ms']}ms latency budget\n")
+
+    def test_every_route_has_a_scenario(self):
+        routes = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+        self.assertEqual(routes - set(SCENARIOS), set(), "Add a scenario for every route")
+
+
+def _route_test(route):
+    def test(self):
+        self.check_route(route)
+    return test
+
+for _route in SCENARIOS:
+    setattr(QueryBudgetTests, f"test_{_route}", _route_test(_route))
+
+
+class ReorderTests(SwiggyTestCase):
+    seed_size = 3
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.f.customer)
+        self.order = Order.objects.create(user=self.f.customer, restaurant=self.f.restaurant, total_amount=300, status="DELIVERED")
+        OrderItem.objects.bulk_create([OrderItem(order=self.order, menu_item=item, quantity=2, price=100) for item in self.f.items])
+
+    def test_reorder_uses_current_prices_and_skips_unavailable_items(self):
+        MenuItem.objects.filter(id=self.f.items[0].id).update(price=150)
+        MenuItem.objects.filter(id=self.f.items[1].id).update(is_available=False)
+        response = self.client.post(reverse("reorder", args=[self.order.id]))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([s["menu_item"] for s in response.data["skipped"]], [self.f.items[1].id])
+        new_order = Order.objects.get(id=response.data["order_id"])
+        self.assertEqual(new_order.total_amount, 150 * 2 + self.f.items[2].price * 2)
+        self.assertEqual(sorted(new_order.items.values_list("menu_item_id", flat=True)), [self.f.items[0].id, self.f.items[2].id])
+
+    def test_nothing_available(self):
+        MenuItem.objects.update(is_available=False)
+        response = self.client.post(reverse("reorder", args=[self.order.id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data["skipped"]), 3)
+        self.assertFalse(Order.objects.filter(id__gt=self.order.id).exists())
+
+    def test_other_users_order(self):
+        self.client.force_authenticate(self.f.owner)
+        self.assertEqual(self.client.post(reverse("reorder", args=[self.order.id])).status_code, 404)
+
+
+class OrderInboxTests(SwiggyTestCase):
+    seed_size = 2
+
+    def setUp(self):
+        super().setUp()
+        self.other_owner = User.objects.create_user(username="other_owner", password=PASSWORD, role="RESTAURANT_OWNER")
+        self.other = Restaurant.objects.create(owner=self.other_owner, restaurant_name="Other Kitchen", restaurant_address="",
+                                               rest_phonenum="", rest_email="", category="dinner")
+        self.other_item = MenuItem.objects.create(restaurant=self.other, name="Curry", price=250, food_type="veg")
+        self.client = APIClient()
+
+    def test_mixed_cart_places_one_order_per_restaurant(self):
+        CartItem.objects.create(cart=self.f.customer.cart, menu_item=self.other_item, quantity=1)
+        self.client.force_authenticate(self.f.customer)
+        response = self.client.post(reverse("place_order"))
+        self.assertEqual(response.status_code, 200)
+        orders = {o.restaurant_id: o for o in Order.objects.filter(id__in=response.data["order_ids"])}
+        self.assertEqual(set(orders), {self.f.restaurant.id, self.other.id})
+        self.assertEqual(orders[self.other.id].total_amount, 250)
+        self.assertEqual(list(orders[self.other.id].items.values_list("menu_item_id", flat=True)), [self.other_item.id])
+        self.assertEqual(orders[self.f.restaurant.id].total_amount, sum(item.price * 2 for item in self.f.items))
+        self.assertFalse(CartItem.objects.filter(cart__user=self.f.customer).exists())
+
+    def test_owner_sees_only_their_restaurants_orders(self):
+        theirs = Order.objects.create(user=self.f.customer, restaurant=self.other, total_amount=250)
+        self.client.force_authenticate(self.other_owner)
+        ids = [o["id"] for o in self.client.get(reverse("restaurant_orders")).data["results"]]
+        self.assertEqual(ids, [theirs.id])
+        self.client.force_authenticate(self.f.owner)
+        ids = [o["id"] for o in self.client.get(reverse("restaurant_orders"), {"status": "PENDING"}).data["results"]]
+        self.assertEqual(ids, [o.id for o in reversed(self.f.orders) if o.status == "PENDING"])
+
+
+class BulkMenuTests(SwiggyTestCase):
+    seed_size = 3
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.f.owner)
+
+    def test_non_utf8_csv_is_rejected(self):
+        upload = SimpleUploadedFile("menu.csv", "name,price,food_type\nCrème brûlée,120,veg\n".encode("latin-1"))
+        response = self.client.post(reverse("bulk_upsert_menu"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+
+    def test_owner_of_several_restaurants_must_pick_one(self):
+        second = Restaurant.objects.create(owner=self.f.owner, restaurant_name="Second", restaurant_address="", rest_phonenum="",
+                                           rest_email="", category="dinner")
+        rows = {"items": [{"name": "Soup", "price": "80.00", "food_type": "veg"}]}
+        self.assertEqual(self.client.post(reverse("bulk_upsert_menu"), rows, format="json").status_code, 400)
+        response = self.client.post(reverse("bulk_upsert_menu") + f"?restaurant={second.id}", rows, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(MenuItem.objects.filter(restaurant=second, name="Soup").exists())
+
+    def upload(self, rows):
+        return self.client.post(reverse("bulk_upsert_menu"), {"items": rows}, format="json").data
+
+    def test_concurrently_inserted_name_becomes_an_update_of_supplied_fields(self):
+        real = views._insert_menu_items
+        def racing(restaurant, rows, to_update):
+            # Another upload inserts "Soup", disabled, between the lookup and the insert.
+            MenuItem.objects.create(restaurant=restaurant, name="Soup", price=50, food_type="veg", is_available=False)
+            return real(restaurant, rows, to_update)
+        with mock.patch.object(views, "_insert_menu_items", racing):
+            data = self.upload([{"name": "Soup", "price": "80.00", "food_type": "veg"},
+                                {"name": "Tea", "price": "20.00", "food_type": "veg"}])
+        self.assertEqual((data["created"], data["updated"]), (1, 1))
+        soup = MenuItem.objects.get(restaurant=self.f.restaurant, name="Soup")
+        self.assertEqual((soup.price, soup.is_available), (80, False))
+
+    def test_rows_that_change_nothing_are_not_counted_as_updates(self):
+        item = self.f.items[0]
+        data = self.upload([{"name": item.name}, {"name": self.f.items[1].name, "price": str(self.f.items[1].price)},
+                            {"name": self.f.items[2].name, "price": "999.00"}])
+        self.assertEqual((data["created"], data["updated"], data["unchanged"]), (0, 1, 2))
+
+
+class OrderHistoryTests(SwiggyTestCase):
+    seed_size = 30
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.f.customer)
+
+    def test_pages_newest_first_with_item_summaries(self):
+        first = self.client.get(reverse("order_history"), {"page_size": 20}).data
+        second = self.client.get(first["next"]).data
+        ids = [o["id"] for o in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted((o.id for o in self.f.orders), reverse=True))
+        self.assertIsNone(second["next"])
+        oldest = second["results"][-1]
+        self.assertEqual(oldest["item_count"], 30)
+        self.assertEqual(oldest["restaurant_name"], "Main Kitchen")
+
+    def test_delivered_orders_are_served_from_cache(self):
+        Order.objects.filter(id__in=[o.id for o in self.f.orders[-5:]]).update(status="DELIVERED")
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(reverse("order_history"))
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(reverse("order_history"))
+        delivered = {o.id for o in self.f.orders[-5:]}
+        # Only the undelivered orders' items are fetched once the delivered ones are cached.
+        self.assertLessEqual(delivered, self.prefetched_order_ids(cold))
+        self.assertFalse(delivered & self.prefetched_order_ids(warm))
+
+    def prefetched_order_ids(self, queries):
+        sql = next(q["sql"] for q in queries.captured_queries if 'FROM "swiggy_orderitem"' in q["sql"])
+        return {int(i) for i in re.search(r'"order_id" IN \(([^)]*)\)', sql).group(1).split(", ")}
+
+    def test_status_change_drops_cached_payload(self):
+        order = self.f.orders[-1]
+        Order.objects.filter(id=order.id).update(status="DELIVERED")
+        self.client.get(reverse("order_history"))
+        self.client.force_authenticate(self.f.delivery)
+        self.client.post(reverse("delivery_update_status", args=[order.id]), {"status": "OUT_FOR_DELIVERY"})
+        self.client.force_authenticate(self.f.customer)
+        self.assertEqual(self.client.get(reverse("order_history")).data["results"][0]["status"], "OUT_FOR_DELIVERY")
+
+    def test_deleted_restaurant_is_not_served_from_cache(self):
+        Order.objects.filter(id=self.f.orders[-1].id).update(status="DELIVERED")
+        self.client.get(reverse("order_history"))
+        self.f.restaurant.delete()
+        latest = self.client.get(reverse("order_history")).data["results"][0]
+        self.assertEqual((latest["restaurant"], latest["restaurant_name"]), (None, None))
+
+
+class ProfilingTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.factory = RequestFactory()
+
+    def test_disabled_middleware_is_removed(self):
+        with override_settings(SWIGGY_PROFILING={"ENABLED": False}), self.assertRaises(MiddlewareNotUsed):
+            profiling.ProfilingMiddleware(lambda request: HttpResponse("ok"))
+
+    def test_header_with_token_triggers_profile(self):
+        with override_settings(SWIGGY_PROFILING={"ENABLED": True, "TOKEN": "secret", "DIRECTORY": self.directory}):
+            middleware = profiling.ProfilingMiddleware(lambda request: HttpResponse("ok"))
+            untouched = middleware(self.factory.get("/api/profile/", HTTP_X_SWIGGY_PROFILE="wrong"))
+            profiled = middleware(self.factory.get("/api/profile/", HTTP_X_SWIGGY_PROFILE="secret"))
+            self.assertNotIn("X-Profile-Id", untouched)
+            self.assertEqual([p["name"] for p in profiling.list_profiles()], [profiled["X-Profile-Id"]])
+            self.assertTrue(profiled["X-Profile-Id"].endswith(".pstats"))
+
+    def test_sampler_writes_collapsed_stacks(self):
+        with override_settings(SWIGGY_PROFILING={"ENABLED": True, "MODE": "sample", "SAMPLE_RATE": 1.0,
+                                                 "INTERVAL": 0.001, "DIRECTORY": self.directory}):
+            middleware = profiling.ProfilingMiddleware(lambda request: time.sleep(0.05) or HttpResponse("ok"))
+            name = middleware(self.factory.get("/api/feed/"))["X-Profile-Id"]
+            lines = Path(profiling.profile_path(name)).read_text().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+
+    def test_ring_buffer_keeps_newest_files(self):
+        with override_settings(SWIGGY_PROFILING={"ENABLED": True, "SAMPLE_RATE": 1.0, "MAX_FILES": 3, "DIRECTORY": self.directory}):
+            middleware = profiling.ProfilingMiddleware(lambda request: HttpResponse("ok"))
+            names = [middleware(self.factory.get("/api/profile/"))["X-Profile-Id"] for _ in range(5)]
+            self.assertEqual([p["name"] for p in profiling.list_profiles()], names[:1:-1])
+
+    def test_profile_path_rejects_names_outside_the_buffer(self):
+        with override_settings(SWIGGY_PROFILING={"DIRECTORY": self.directory}):
+            self.assertIsNone(profiling.profile_path("../settings.py"))
+            self.assertIsNone(profiling.profile_path("missing.pstats"))
+
+
+class ReplicaPinningTests(SwiggyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.user = SimpleNamespace(pk=7, is_authenticated=True)
+
+    def request(self, method="get", cookies=None, user=None):
+        request = getattr(self.factory, method)("/api/orders/")
+        request.COOKIES.update(cookies or {})
+        request.user = user or self.user
+        return request
+
+    def write(self, status=201):
+        return db_router.ReplicaPinningMiddleware(lambda r: HttpResponse(status=status))(self.request("post")).cookies
+
+    def test_successful_write_pins_the_writer(self):
+        self.write()
+        self.assertTrue(db_router.is_pinned(self.request()))
+        self.assertFalse(db_router.is_pinned(self.request(user=SimpleNamespace(pk=8, is_authenticated=True))))
+
+    def test_cookie_pins_browsers_when_the_cache_loses_the_pin(self):
+        cookies = {name: morsel.value for name, morsel in self.write().items()}
+        cache.clear()
+        self.assertTrue(db_router.is_pinned(self.request(cookies=cookies)))
+        self.assertFalse(db_router.is_pinned(self.request(cookies=cookies, user=SimpleNamespace(pk=8, is_authenticated=True))))
+
+    def test_failed_write_does_not_pin(self):
+        self.assertNotIn(db_router.PIN_COOKIE, self.write(status=400))
+
+    def test_pin_expires_after_sticky_seconds(self):
+        cookies = {name: morsel.value for name, morsel in self.write().items()}
+        with mock.patch("time.time", return_value=time.time() + 6):
+            self.assertFalse(db_router.is_pinned(self.request()))
+            self.assertFalse(db_router.is_pinned(self.request(cookies=cookies)))
+
+
+class MenuCacheTests(SwiggyTestCase):
+    def test_rebuild_started_before_a_write_is_not_served(self):
+        def stale_build():
+            # A write lands while this rebuild is reading the old rows.
+            menu_cache.invalidate_menu()
+            return ["stale"]
+        self.assertEqual(menu_cache.get_menu(stale_build), ["stale"])
+        self.assertEqual(menu_cache.get_menu(lambda: ["fresh"]), ["fresh"])
+
+    def test_lost_version_key_does_not_revive_old_menus(self):
+        menu_cache.get_menu(lambda: ["old"])
+        cache.delete(menu_cache.MENU_VERSION_KEY)
+        self.assertEqual(menu_cache.get_menu(lambda: ["new"]), ["new"])
+
+    def test_availability_toggle_patches_the_cached_menu(self):
+        f = seed(3)
+        client = APIClient()
+        client.force_authenticate(f.customer)
+        client.get(reverse("all_menu"))
+        client.force_authenticate(f.owner)
+        client.patch(reverse("update_menu_availability"), {"items": [f.items[0].id], "is_available": False}, format="json")
+        client.force_authenticate(f.customer)
+        with CaptureQueriesContext(connection) as queries:
+            menu = client.get(reverse("all_menu")).data
+        self.assertFalse(any('FROM "swiggy_menuitem"' in q["sql"] for q in queries.captured_queries))
+        self.assertFalse(next(m for m in menu if m["id"] == f.items[0].id)["is_available"])
+
+    def test_toggle_racing_another_write_is_not_served(self):
+        menu_cache.get_menu(lambda: [{"id": 1, "is_available": True}])
+        version = cache_versions.current(menu_cache.MENU_VERSION_KEY)
+        with mock.patch.object(cache_versions, "current", return_value=version):
+            # Another write bumps the version after the toggle read it.
+            menu_cache.invalidate_menu()
+            menu_cache.set_availability([1], False)
+        self.assertEqual(menu_cache.get_menu(lambda: ["rebuilt"]), ["rebuilt"])
+
+
+class FeedTests(SwiggyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.restaurants = Restaurant.objects.bulk_create([
+            Restaurant(restaurant_name=f"R{i}", restaurant_address="", rest_phonenum="", rest_email="", category="lunch", rating=i)
+            for i in range(3)
+        ])
+
+    def ranking(self):
+        return [e["id"] for e in feed.get_feed("lunch")]
+
+    def test_build_racing_a_refresh_is_not_served(self):
+        generation = feed._generation("lunch")
+        # The rating lands and is refreshed after the reader queried the old rows.
+        Restaurant.objects.filter(id=self.restaurants[0].id).update(rating=5)
+        feed.refresh_restaurants([self.restaurants[0].id])
+        cache.set(feed._key("lunch"), {"generation": generation, "complete": True, "entries": []})
+        self.assertEqual(self.ranking()[0], self.restaurants[0].id)
+
+    def test_refresh_patches_the_current_feed(self):
+        self.assertEqual(self.ranking()[0], self.restaurants[2].id)
+        Restaurant.objects.filter(id=self.restaurants[0].id).update(rating=5)
+        feed.refresh_restaurants([self.restaurants[0].id])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.ranking()[0], self.restaurants[0].id)
+
+    def test_lost_generation_key_does_not_revive_old_feeds(self):
+        self.ranking()
+        cache.delete(feed._generation_key("lunch"))
+        Restaurant.objects.filter(id=self.restaurants[0].id).update(rating=5)
+        self.assertEqual(self.ranking()[0], self.restaurants[0].id)
+
+
+@override_settings(SWIGGY_THROTTLE={"BACKEND": "local", "RATES": {"login_user": {"ip": "10/min", "endpoint": "50/min"}}})
+class ThrottleTests(SwiggyTestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.create_user(username="customer", password=PASSWORD)
+
+    def login(self, ip):
+        return APIClient().post(reverse("login"), {"username": "customer", "password": PASSWORD}, REMOTE_ADDR=ip).status_code
+
+    def test_refused_requests_do_not_drain_the_endpoint_bucket(self):
+        for backend in ("local", "cache"):
+            with self.subTest(backend=backend), override_settings(SWIGGY_THROTTLE={**settings.SWIGGY_THROTTLE, "BACKEND": backend}):
+                get_store().clear()
+                cache.clear()
+                statuses = [self.login("10.0.0.1") for _ in range(60)]
+                self.assertEqual(statuses.count(200), 10)
+                self.assertEqual(self.login("10.0.0.2"), 200)
+
+    def test_shared_buckets_hold_under_concurrent_workers(self):
+        store = CacheBucketStore(caches["default"])
+        allowed = []
+        def worker():
+            allowed.extend(store.consume([("k:endpoint:all", 20, 20 / 60)], 0) == 0 for _ in range(25))
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(allowed.count(True), 20)
+
+    def test_shared_buckets_need_an_atomic_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CacheBucketStore(FileBasedCache(tempfile.gettempdir(), {}))
+
+
+@override_settings(
+    PASSWORD_HASHERS=["swiggy.hashers.TunablePBKDF2PasswordHasher"],
+    SWIGGY_AUTH={"PBKDF2_ITERATIONS": 1000, "CREDENTIAL_CACHE_TTL": 60},
+    SWIGGY_THROTTLE={"RATES": {}},
+)
+class LoginTests(SwiggyTestCase):
+    def setUp(self):
+        super().setUp()
+        auth.reset_pool()
+        self.addCleanup(auth.reset_pool)
+        self.user = User.objects.create_user(username="customer", password=PASSWORD)
+
+    def login(self, password=PASSWORD):
+        return APIClient().post(reverse("login"), {"username": "customer", "password": password}).status_code
+
+    def test_repeat_logins_skip_the_hash(self):
+        self.assertEqual(self.login(), 200)
+        with mock.patch("swiggy.auth.verify_password", wraps=verify_password) as verify:
+            self.assertEqual(self.login(), 200)
+            self.assertEqual(self.login("wrong"), 400)
+        self.assertEqual(verify.call_count, 1)
+
+    def test_password_change_invalidates_cached_checks(self):
+        self.assertEqual(self.login(), 200)
+        self.user.set_password("new-pass-456")
+        self.user.save()
+        self.assertEqual(self.login(), 400)
+        self.assertEqual(self.login("new-pass-456"), 200)
+
+    def test_login_rehashes_with_new_cost(self):
+        with override_settings(SWIGGY_AUTH={**settings.SWIGGY_AUTH, "PBKDF2_ITERATIONS": 2000}):
+            self.assertEqual(self.login(), 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertEqual(self.login(), 200)
+
+    def test_inactive_users_are_refused_after_a_hash(self):
+        self.assertEqual(self.login(), 200)
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        with mock.patch("swiggy.auth.make_password", wraps=make_password) as hasher:
+            self.assertEqual(self.login(), 400)
+        self.assertEqual(hasher.call_count, 1)
+
+    def test_failures_send_user_login_failed(self):
+        failures = []
+        receiver = lambda sender, credentials, **kwargs: failures.append(credentials["username"])
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+        self.assertEqual(self.login("wrong"), 400)
+        self.assertEqual(failures, ["customer"])
+
+    def test_full_hashing_queue_returns_503(self):
+        with override_settings(SWIGGY_AUTH={**settings.SWIGGY_AUTH, "HASH_QUEUE": 0}):
+            auth.reset_pool()
+            self.assertEqual(self.login(), 503)
+
+class NearbySearchTests(SwiggyTestCase):
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(0)
+        rows = []
+        for i in range(500):
+            lat, lng = POINT[0] + rng.uniform(-0.5, 0.5), POINT[1] + rng.uniform(-0.5, 0.5)
+            rows.append(Restaurant(restaurant_name=f"R{i}", restaurant_address="", rest_phonenum="", rest_email="",
+                                   category=rng.choice(["lunch", "dinner"]), latitude=lat, longitude=lng, geohash=geo.encode(lat, lng)))
+        Restaurant.objects.bulk_create(rows)
+
+    def test_matches_a_full_scan_within_a_category(self):
+        got = [r.id for _, r in geo.nearest(Restaurant.objects.all(), *POINT, 10, category="lunch")]
+        rows = Restaurant.objects.filter(category="lunch").values_list("id", "latitude", "longitude")
+        self.assertEqual(got, [i for _, i in sorted((geo.haversine_km(*POINT, a, b), i) for i, a, b in rows)[:10]])
+
+    def test_finds_the_nearest_row_just_outside_the_neighbourhood(self):
+        dlat, _ = geo.cell_size(6)
+        lat = (math.floor((40.0 + 90.0) / dlat) + 1) * dlat - 90.0 - 1e-9  # just below a cell's top edge
+        lng = 10.0
+        km_per_degree = math.pi * geo.EARTH_RADIUS_KM / 180
+        north = (lat + 0.6110 / km_per_degree, lng)
+        east = (lat, lng + 0.6112 / (km_per_degree * math.cos(math.radians(lat))))
+        self.assertNotIn(geo.encode(*north, 6), geo.neighbourhood(lat, lng, 6))
+        self.assertLess(geo.haversine_km(lat, lng, *north), geo.haversine_km(lat, lng, *east))
+        Restaurant.objects.bulk_create([
+            Restaurant(restaurant_name=name, restaurant_address="", rest_phonenum="", rest_email="", category="lunch",
+                       latitude=a, longitude=b, geohash=geo.encode(a, b))
+            for name, (a, b) in (("north", north), ("east", east))
+        ])
+        [(_, row)] = geo.nearest(Restaurant.objects.all(), lat, lng, 1)
+        self.assertEqual(row.restaurant_name, "north")
+
+    def test_category_searches_range_scan_the_geohash(self):
+        cells = geo.neighbourhood(*POINT, 6)
+        plan = geo._within_cells(Restaurant.objects.all(), cells, {"category": "lunch"}).explain()
+        self.assertEqual(plan.count("restaurant_category_geo_idx (category=? AND geohash>? AND geohash<?)"), len(cells))
+
+
+CALLS = []
+
+@jobs.task("tests.record", max_attempts=2)
+def record(fail=False):
+    CALLS.append(fail)
+    if fail:
+        raise RuntimeError("job failed")
+
+
+@override_settings(SWIGGY_JOBS={"EAGER": False, "BACKOFF_BASE": 10.0, "STALE_AFTER": 60})
+class JobTests(SwiggyTestCase):
+    def setUp(self):
+        super().setUp()
+        CALLS.clear()
+
+    def make_stale(self, job):
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(seconds=61))
+
+    def test_claim_takes_each_due_job_once(self):
+        due = jobs.enqueue("tests.record")
+        jobs.enqueue("tests.record", delay=60)
+        jobs.enqueue("tests.record", queue="other")
+        [job] = jobs.claim("default", 10)
+        self.assertEqual((job.id, job.status, job.attempts), (due.id, "RUNNING", 1))
+        self.assertEqual(jobs.claim("default", 10), [])
+
+    def test_failures_back_off_then_fail(self):
+        job = jobs.enqueue("tests.record", {"fail": True})
+        jobs.run(jobs.claim("default", 1)[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, "PENDING")
+        self.assertIn("job failed", job.last_error)
+        self.assertGreaterEqual(job.run_at, timezone.now() + timedelta(seconds=4))
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs("swiggy.jobs", "ERROR"):
+            jobs.run(jobs.claim("default", 1)[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, len(CALLS)), ("FAILED", 2, 2))
+
+    def test_idempotency_key_enqueues_once(self):
+        first = jobs.enqueue("tests.record", idempotency_key="order-1")
+        self.assertEqual(jobs.enqueue("tests.record", {"fail": True}, idempotency_key="order-1").id, first.id)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_heartbeat_keeps_a_running_job_claimed(self):
+        job = jobs.enqueue("tests.record")
+        jobs.claim("default", 1)
+        self.make_stale(job)
+        jobs.heartbeat([job.id])
+        self.assertEqual(jobs.requeue_stale(), 0)
+
+    def test_stale_job_is_retried_until_attempts_run_out(self):
+        job = jobs.enqueue("tests.record")
+        jobs.claim("default", 1)
+        self.make_stale(job)
+        self.assertEqual(jobs.requeue_stale(), 1)
+        jobs.claim("default", 1)
+        self.make_stale(job)
+        with self.assertLogs("swiggy.jobs", "ERROR"):
+            self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("FAILED", 2))
+
+    def test_outcome_of_a_requeued_run_is_left_to_the_new_owner(self):
+        job = jobs.enqueue("tests.record")
+        [lost] = jobs.claim("default", 1)
+        self.make_stale(job)
+        jobs.requeue_stale()
+        jobs.claim("default", 1)
+        with self.assertLogs("swiggy.jobs", "WARNING"):
+            jobs.run(lost)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("RUNNING", 2))
+
+    def test_prune_deletes_old_done_jobs(self):
+        old, recent, failed = (jobs.enqueue("tests.record") for _ in range(3))
+        Job.objects.filter(id__in=[old.id, recent.id]).update(status="DONE")
+        Job.objects.filter(id=failed.id).update(status="FAILED")
+        Job.objects.exclude(id=recent.id).update(updated_at=timezone.now() - timedelta(days=8))
+        self.assertEqual(jobs.prune(), 1)
+        self.assertFalse(Job.objects.filter(id=old.id).exists())
@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_THROTTLE = {
+    # "local" keeps buckets in process memory; "cache" shares them between
+    # workers through the default cache, which must have an atomic incr (Redis,
+    # Memcached); the file and database caches do not.
+    "BACKEND": "local",
+    "MAX_LOCAL_BUCKETS": 100000,
+    # view name -> {"user" | "ip" | "endpoint": "<burst>/<sec|min|hour|day>"}
+    "RATES": {},
+}
+
+DEFAULT_LOAD_SHEDDING = {
+    "ENABLED": True,
+    # Requests for these paths are rejected with 503 while the process is overloaded.
+    "PATHS": [],
+    # Counted per process. A sync worker serves one request at a time, so this only
+    # sheds load with threaded (gthread) or async workers; otherwise the latency
+    # budget is what rejects requests.
+    "MAX_IN_FLIGHT": 64,
+    "LATENCY_BUDGET_MS": 1000,
+    # The latency average decays by half every HALF_LIFE seconds, so shedding stops once load drops.
+    "HALF_LIFE": 1.0,
+}
+
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+
+def throttle_settings():
+    return {**DEFAULT_THROTTLE, **getattr(settings, "SWIGGY_THROTTLE", {})}
+
+def load_shedding_settings():
+    return {**DEFAULT_LOAD_SHEDDING, **getattr(settings, "SWIGGY_LOAD_SHEDDING", {})}
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill of 10 tokens per 60 seconds)."""
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period]
+
+
+class LocalBucketStore:
+    """Token buckets in process memory, bounded by evicting the least recently used."""
+
+    def __init__(self, max_buckets):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, buckets, now):
+        with self.lock:
+            current = {key: self.buckets.pop(key, (capacity, now)) for key, capacity, _ in buckets}
+            tokens, wait = _take_all(buckets, current, now)
+            for key, _, _ in buckets:
+                self.buckets[key] = (tokens[key], now)
+            while len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """Request counters in the shared Django cache so every worker sees the same counts.
+
+    A read-modify-write of a token bucket races between workers, so each bucket
+    is approximated by a counter per refill period, raised with the cache's
+    atomic incr: at most ``capacity`` requests pass per period, however many
+    workers share it. Windows follow the wall clock, which all hosts agree on.
+    """
+
+    def __init__(self, cache):
+        if type(cache).incr is BaseCache.incr:
+            raise ImproperlyConfigured(
+                f"SWIGGY_THROTTLE['BACKEND'] = 'cache' needs a cache with an atomic incr, not {type(cache).__name__}")
+        self.cache = cache
+
+    def consume(self, buckets, now):
+        now = time.time()
+        taken, wait = [], 0.0
+        for key, capacity, refill_rate in buckets:
+            period = capacity / refill_rate
+            window = int(now // period)
+            cache_key = f"swiggy:throttle:{key}:{window}"
+            self.cache.add(cache_key, 0, timeout=int(period) + 1)
+            try:
+                count = self.cache.incr(cache_key)
+            except ValueError:
+                # Expired between add() and incr(); start the window again.
+                count = 1 if self.cache.add(cache_key, 1, timeout=int(period) + 1) else self.cache.incr(cache_key)
+            taken.append(cache_key)
+            if count > capacity:
+                wait = (window + 1) * period - now
+                break
+        if wait:
+            # Like _take_all, a refused request must not use up the other buckets.
+            for cache_key in taken:
+                try:
+                    self.cache.decr(cache_key)
+                except ValueError:
+                    pass
+        return wait
+
+    def clear(self):
+        pass
+
+def _take_all(buckets, current, now):
+    """Refill every bucket and take a token from each only if all of them have one.
+
+    A request refused by one bucket must not drain the others; otherwise a
+    client over its own limit would keep emptying the shared endpoint bucket.
+    Returns the new token counts and the wait until all buckets allow a request.
+    """
+    tokens, wait = {}, 0.0
+    for key, capacity, refill_rate in buckets:
+        count, updated = current[key]
+        tokens[key] = min(capacity, count + (now - updated) * refill_rate)
+        if tokens[key] < 1:
+            wait = max(wait, (1 - tokens[key]) / refill_rate)
+    if wait == 0:
+        tokens = {key: count - 1 for key, count in tokens.items()}
+    return tokens, wait
+
+
+_local_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _local_store
+    config = throttle_settings()
+    if config["BACKEND"] == "cache":
+        return CacheBucketStore(caches["default"])
+    if _local_store is None:
+        with _store_lock:
+            if _local_store is None:
+                _local_store = LocalBucketStore(config["MAX_LOCAL_BUCKETS"])
+    return _local_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Per-user, per-IP and per-endpoint token buckets configured in ``SWIGGY_THROTTLE["RATES"]``.
+
+    Views are looked up by function name; views without an entry are not throttled.
+    """
+
+    def allow_request(self, request, view):
+        rates = throttle_settings()["RATES"].get(type(view).__name__)
+        self._wait = 0.0
+        if not rates:
+            return True
+        buckets = []
+        for kind, rate in rates.items():
+            capacity, refill_rate = parse_rate(rate)
+            buckets.append((f"{type(view).__name__}:{kind}:{self.get_bucket_ident(kind, request)}", capacity, refill_rate))
+        self._wait = get_store().consume(buckets, time.monotonic())
+        return self._wait == 0
+
+    def get_bucket_ident(self, kind, request):
+        if kind == "endpoint":
+            return "all"
+        if kind == "user" and request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+    def wait(self):
+        return self._wait
+
+
+class LoadState:
+    """Process-wide in-flight count and decaying latency average of sheddable requests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency_ms = 0.0
+        self.latency_at = time.monotonic()
+
+    def decayed_latency(self, now, half_life):
+        return self.latency_ms * 0.5 ** ((now - self.latency_at) / half_life)
+
+    def reset(self):
+        with self.lock:
+            self.in_flight = 0
+            self.latency_ms = 0.0
+
+load_state = LoadState()
+
+
+class LoadSheddingMiddleware:
+    """Reject sheddable requests with 503 before any work is done while the process is overloaded.
+
+    Overload means too many requests in flight, or a recent average latency
+    of sheddable requests above the budget.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = load_shedding_settings()
+        sheddable = config["ENABLED"] and request.path in config["PATHS"]
+        state = load_state
+        started = time.monotonic()
+        with state.lock:
+            latency = state.decayed_latency(started, config["HALF_LIFE"])
+            if sheddable and (state.in_flight >= config["MAX_IN_FLIGHT"] or latency > config["LATENCY_BUDGET_MS"]):
+                response = JsonResponse({"error": "Server busy, retry shortly"}, status=503)
+                response["Retry-After"] = "1"
+                return response
+            state.in_flight += 1
+        try:
+            return self.get_response(request)
+        finally:
+            done = time.monotonic()
+            with state.lock:
+                state.in_flight -= 1
+                if sheddable:
+                    latency = state.decayed_latency(done, config["HALF_LIFE"])
+                    state.latency_ms = 0.8 * latency + 0.2 * (done - started) * 1000
+                    state.latency_at = done
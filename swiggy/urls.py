@@ -13,9 +13,13 @@ urlpatterns = [
     path('api/add_restaurant/', views.add_restaurant, name='add_restaurant'),
     path('api/add_menu/', views.add_menu, name='add_menu'),
     path('api/update_menu/<int:menu_id>/', views.update_menu, name='update_menu'),
+    path('api/menu_availability/', views.update_menu_availability, name='update_menu_availability'),
     path('api/all_menu/', views.list_menu, name='all_menu'),
     path('api/delete_menu/<int:menu_id>/', views.delete_menu, name='delete_menu'),
+    path('api/bulk_menu/', views.bulk_upsert_menu, name='bulk_upsert_menu'),
     path('api/search_restaurant/', views.search_restaurant, name='search_restaurants'),
+    path('api/restaurants/nearby/', views.nearby_restaurants, name='nearby_restaurants'),
+    path('api/feed/', views.home_feed, name='home_feed'),
 
     # CART
     path('api/add_to_cart/', views.add_to_cart, name='add_to_cart'),
@@ -24,6 +28,9 @@ urlpatterns = [
 
     # ORDERS
     path('api/place_order/', views.place_order, name='place_order'),
+    path('api/reorder/<int:order_id>/', views.reorder, name='reorder'),
+    path('api/orders/', views.order_history, name='order_history'),
+    path('api/restaurant/orders/', views.restaurant_orders, name='restaurant_orders'),
     # path('api/update_order_status/<int:order_id>/', views.update_order_status, name='update_order_status'),
 
     # RATINGS / REVIEWS
@@ -36,6 +43,8 @@ urlpatterns = [
     path('api/admin/update_restaurant/<int:restaurant_id>/', views.admin_update_restaurants, name='admin_update_restaurant'),
     path('api/admin/delete_restaurant/<int:restaurant_id>/', views.admin_delete_restaurants, name='admin_delete_restaurant'),
     path('api/admin/orders/', views.admin_list_orders, name='admin_list_orders'),
+    path('api/admin/profiles/', views.admin_list_profiles, name='admin_list_profiles'),
+    path('api/admin/profiles/<str:name>/', views.admin_download_profile, name='admin_download_profile'),
 
     # DELIVERY
     path("api/delivery/accept/<int:order_id>/", views.delivery_accept_order, name="delivery_accept_order"),
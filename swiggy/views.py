@@ -1,24 +1,29 @@
+import csv
+import io
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
-from django.db.models import Avg
+from rest_framework.exceptions import ValidationError
+from django.db.models import Avg, Count, F, Prefetch, Sum, prefetch_related_objects
+from django.db.models.functions import Now
 from functools import wraps
 from .models import User, Restaurant, MenuItem, Cart, CartItem, Order, OrderItem, RatingReview
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer,
-    RestaurantSerializer, MenuItemSerializer, CartItemSerializer, RatingReviewSerializer
+    RestaurantSerializer, NearbyRestaurantQuerySerializer, FeedQuerySerializer,
+    MenuItemSerializer, MenuItemBulkSerializer, MenuAvailabilitySerializer,
+    CartItemSerializer, OrderSerializer, OrderHistorySerializer, RatingReviewSerializer
 )
-import paypalrestsdk
-from django.conf import settings
+from .db_router import read_replica
+from .pagination import OrderCursorPagination
+from .payments import paypal
+from . import feed, geo, jobs, menu_cache, order_cache, profiling
 
-# Configure PayPal SDK
-paypalrestsdk.configure({
-    "mode": settings.PAYPAL_MODE,
-    "client_id": settings.PAYPAL_CLIENT_ID,
-    "client_secret": settings.PAYPAL_CLIENT_SECRET
-})
+BULK_MENU_MAX_ROWS = 5000
 
 # --- Role-based decorator ---
 def role_required(allowed_roles):
@@ -47,7 +52,7 @@ def register_user(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login_user(request):
-    serializer = UserLoginSerializer(data=request.data)
+    serializer = UserLoginSerializer(data=request.data, context={"request": request})
     if serializer.is_valid():
         user = serializer.validated_data["user"]
         token, _ = Token.objects.get_or_create(user=user)
@@ -65,7 +70,8 @@ def profile(request):
             data["restaurant"] = RestaurantSerializer(restaurant).data
     if user.role == "CUSTOMER":
         cart, _ = Cart.objects.get_or_create(user=user)
-        data["cart"] = {"items_count": cart.items.count(), "total": float(sum(i.subtotal for i in cart.items.all()))}
+        summary = cart.items.aggregate(items_count=Count("id"), total=Sum(F("menu_item__price") * F("quantity")))
+        data["cart"] = {"items_count": summary["items_count"], "total": float(summary["total"] or 0)}
     return Response(data)
 
 # --- RESTAURANTS ---
@@ -78,28 +84,75 @@ def add_restaurant(request):
     data["owner"] = request.user.id
     serializer = RestaurantSerializer(data=data)
     if serializer.is_valid():
-        serializer.save()
+        restaurant = serializer.save()
+        jobs.enqueue("feed.refresh_restaurants", {"restaurant_ids": [restaurant.id]})
         return Response({"message":"Restaurant added","restaurant": serializer.data}, status=201)
     return Response(serializer.errors)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_replica
 def search_restaurant(request):
     name = request.GET.get("restaurant_name","")
     restaurants = Restaurant.objects.filter(restaurant_name__icontains=name)
     serializer = RestaurantSerializer(restaurants, many=True)
     return Response(serializer.data if restaurants.exists() else {"message":"No restaurant found"})
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_replica
+def nearby_restaurants(request):
+    query = NearbyRestaurantQuerySerializer(data=request.GET)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    exact = {"category": params["category"]} if params.get("category") else {}
+    data = []
+    for distance, restaurant in geo.nearest(Restaurant.objects.filter(is_open=True), params["lat"], params["lng"], params["k"], **exact):
+        data.append({**RestaurantSerializer(restaurant).data, "distance_km": round(distance, 3)})
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def home_feed(request):
+    query = FeedQuerySerializer(data=request.GET)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    size = params["page_size"]
+    if not params.get("category"):
+        # Home screen: the first page of every category in one cache round trip.
+        return Response({"categories": {c: entries[:size] for c, entries in feed.get_feeds(feed.CATEGORIES).items()}})
+    entries = feed.get_feed(params["category"])
+    start = (params["page"] - 1) * size
+    limit = min(len(entries), feed.feed_settings()["SIZE"])
+    return Response({"category": params["category"],"page": params["page"],"has_next": start + size < limit,"results": entries[start:min(start + size, limit)]})
+
 # --- MENU ---
+def _owned_restaurant(request):
+    """The requesting owner's restaurant picked by a ``restaurant`` id, or their only one."""
+    restaurants = Restaurant.objects.filter(owner=request.user)
+    data = request.data if hasattr(request.data, "get") else {}
+    restaurant_id = data.get("restaurant") or request.GET.get("restaurant")
+    if restaurant_id:
+        if not str(restaurant_id).isdigit():
+            raise ValidationError({"error": "restaurant must be a restaurant id"})
+        return get_object_or_404(restaurants, id=restaurant_id)
+    found = list(restaurants[:2])
+    if not found:
+        raise Http404("No restaurant found")
+    if len(found) > 1:
+        raise ValidationError({"error": "You own several restaurants, pass the restaurant id as 'restaurant'"})
+    return found[0]
+
 @api_view(['POST'])
 @role_required(["RESTAURANT_OWNER"])
 def add_menu(request):
-    restaurant = get_object_or_404(Restaurant, owner=request.user)
+    restaurant = _owned_restaurant(request)
     data = request.data.copy()
     data["restaurant"] = restaurant.id
     serializer = MenuItemSerializer(data=data)
     if serializer.is_valid():
         serializer.save()
+        menu_cache.invalidate_menu()
         return Response(serializer.data)
     return Response(serializer.errors)
 
@@ -112,9 +165,26 @@ def update_menu(request, menu_id):
     serializer = MenuItemSerializer(menu, data=request.data, partial=True)
     if serializer.is_valid():
         serializer.save()
+        menu_cache.invalidate_menu()
         return Response(serializer.data)
     return Response(serializer.errors)
 
+@api_view(['PATCH'])
+@role_required(["RESTAURANT_OWNER"])
+def update_menu_availability(request):
+    serializer = MenuAvailabilitySerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = set(serializer.validated_data["items"])
+    is_available = serializer.validated_data["is_available"]
+    # Ownership is checked in the UPDATE itself; items the user does not own are simply not matched.
+    updated = MenuItem.objects.filter(restaurant__owner=request.user, id__in=ids).update(is_available=is_available)
+    if updated == len(ids):
+        menu_cache.set_availability(ids, is_available)
+    else:
+        # Which ids were matched is unknown, so the cached menu cannot be patched.
+        menu_cache.invalidate_menu()
+    return Response({"updated": updated, "skipped": len(ids) - updated, "is_available": is_available})
+
 @api_view(['DELETE'])
 @role_required(["RESTAURANT_OWNER"])
 def delete_menu(request, menu_id):
@@ -122,14 +192,102 @@ def delete_menu(request, menu_id):
     if menu.restaurant.owner != request.user:
         return Response({"error":"Unauthorized"}, status=403)
     menu.delete()
+    menu_cache.invalidate_menu()
     return Response({"message":"Menu deleted"})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_replica
 def list_menu(request):
-    items = MenuItem.objects.all()
-    serializer = MenuItemSerializer(items, many=True)
-    return Response(serializer.data)
+    data = menu_cache.get_menu(lambda: list(MenuItemSerializer(MenuItem.objects.all(), many=True).data))
+    return Response(data)
+
+def _bulk_menu_rows(request):
+    upload = request.FILES.get("file")
+    if upload:
+        try:
+            text = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValidationError({"error": "CSV files must be UTF-8 encoded"})
+        reader = csv.DictReader(io.StringIO(text))
+        # Blank CSV cells mean "leave unchanged" for existing items.
+        return [{k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""} for row in reader]
+    data = request.data
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise ValidationError({"error": "Send a JSON array of menu items, {\"items\": [...]}, or a CSV file upload"})
+    return data
+
+@api_view(['POST'])
+@role_required(["RESTAURANT_OWNER"])
+def bulk_upsert_menu(request):
+    restaurant = _owned_restaurant(request)
+    rows = _bulk_menu_rows(request)
+    if len(rows) > BULK_MENU_MAX_ROWS:
+        return Response({"error": f"At most {BULK_MENU_MAX_ROWS} rows per upload"}, status=400)
+
+    names = [row.get("name") for row in rows if isinstance(row, dict) and isinstance(row.get("name"), str)]
+    existing = {m.name: m for m in MenuItem.objects.filter(restaurant=restaurant, name__in=names)}
+    create_row = MenuItemBulkSerializer()
+    update_row = MenuItemBulkSerializer(partial=True)
+    to_create, to_update, errors, seen = [], [], [], set()
+    for index, row in enumerate(rows):
+        name = row.get("name") if isinstance(row, dict) else None
+        name = name if isinstance(name, str) else None
+        if name is not None and name in seen:
+            errors.append({"row": index, "errors": {"name": ["Duplicate name in this upload"]}})
+            continue
+        item = existing.get(name)
+        try:
+            validated = (update_row if item else create_row).run_validation(row)
+        except ValidationError as exc:
+            errors.append({"row": index, "errors": exc.detail})
+            continue
+        seen.add(name)
+        if item:
+            to_update.append((item, validated))
+        else:
+            to_create.append(validated)
+
+    if not to_create and not to_update:
+        return Response({"created": 0, "updated": 0, "unchanged": 0, "errors": errors}, status=400 if errors else 200)
+    with transaction.atomic():
+        created = _insert_menu_items(restaurant, to_create, to_update)
+        changed, fields = [], set()
+        for item, validated in to_update:
+            # Only the fields a row supplies are written; the rest keep their current values.
+            changes = {f: v for f, v in validated.items() if f != "name" and getattr(item, f) != v}
+            for field, value in changes.items():
+                setattr(item, field, value)
+            if changes:
+                changed.append(item)
+                fields.update(changes)
+        if changed:
+            MenuItem.objects.bulk_update(changed, sorted(fields))
+        if created or changed:
+            transaction.on_commit(menu_cache.invalidate_menu)
+    return Response({"created": created, "updated": len(changed), "unchanged": len(to_update) - len(changed), "errors": errors})
+
+def _insert_menu_items(restaurant, rows, to_update):
+    """Insert the new rows and return how many were inserted.
+
+    A concurrent upload may insert some of the same names first. Those rows are
+    moved to ``to_update`` and the insert is retried, so they are counted and
+    written as updates of only the fields they supply.
+    """
+    while rows:
+        try:
+            with transaction.atomic():
+                MenuItem.objects.bulk_create([MenuItem(restaurant=restaurant, **row) for row in rows])
+            return len(rows)
+        except IntegrityError:
+            taken = {m.name: m for m in MenuItem.objects.filter(restaurant=restaurant, name__in=[row["name"] for row in rows])}
+            if not taken:
+                raise
+            to_update.extend((taken[row["name"]], row) for row in rows if row["name"] in taken)
+            rows = [row for row in rows if row["name"] not in taken]
+    return 0
 
 # --- CART ---
 @api_view(['POST'])
@@ -158,7 +316,7 @@ def remove_from_cart(request):
 @permission_classes([IsAuthenticated])
 def view_cart(request):
     cart,_ = Cart.objects.get_or_create(user=request.user)
-    items = cart.items.all()
+    items = list(cart.items.select_related("menu_item"))
     total = sum([i.subtotal for i in items])
     data = CartItemSerializer(items, many=True).data
     return Response({"items": data, "total": total})
@@ -168,15 +326,84 @@ def view_cart(request):
 @permission_classes([IsAuthenticated])
 def place_order(request):
     cart = get_object_or_404(Cart, user=request.user)
-    items = cart.items.all()
-    if not items.exists():
+    items = list(cart.items.select_related("menu_item"))
+    if not items:
         return Response({"error":"Cart is empty"}, status=400)
-    total = sum([i.subtotal for i in items])
-    order = Order.objects.create(user=request.user, total_amount=total)
-    for item in items:
-        OrderItem.objects.create(order=order, menu_item=item.menu_item, quantity=item.quantity, price=item.menu_item.price)
-    items.delete()
-    return Response({"message":"Order placed","order_id": order.id})
+    with transaction.atomic():
+        orders = _create_orders(request.user, [(i.menu_item, i.quantity) for i in items])
+        cart.items.all().delete()
+    return Response({"message":"Order placed","order_id": orders[0].id,"order_ids": [o.id for o in orders]})
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reorder(request, order_id):
+    order = get_object_or_404(Order, id=order_id, user=request.user)
+    # One query re-reads every line with its menu item's current price and availability.
+    lines, skipped = [], []
+    for item in order.items.select_related("menu_item"):
+        if item.menu_item is None or not item.menu_item.is_available:
+            skipped.append({"menu_item": item.menu_item_id, "menu_item_name": item.menu_item.name if item.menu_item else None, "quantity": item.quantity})
+        else:
+            lines.append((item.menu_item, item.quantity))
+    if not lines:
+        return Response({"error":"None of the items in this order are available","skipped": skipped}, status=400)
+    with transaction.atomic():
+        orders = _create_orders(request.user, lines)
+    return Response({"message":"Order placed","order_id": orders[0].id,"order_ids": [o.id for o in orders],"skipped": skipped}, status=201)
+
+def _create_orders(user, lines):
+    """Create one order per restaurant for (menu_item, quantity) lines, priced at the current menu price."""
+    by_restaurant = {}
+    for menu_item, quantity in lines:
+        by_restaurant.setdefault(menu_item.restaurant_id, []).append((menu_item, quantity))
+    orders = Order.objects.bulk_create([
+        Order(user=user, restaurant_id=restaurant_id, total_amount=sum(m.price * q for m, q in group))
+        for restaurant_id, group in by_restaurant.items()
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, menu_item=m, quantity=q, price=m.price)
+        for order, group in zip(orders, by_restaurant.values()) for m, q in group
+    ])
+    # Each restaurant got exactly one new order.
+    Restaurant.objects.filter(id__in=by_restaurant).update(order_count=F("order_count") + 1, last_ordered_at=Now())
+    jobs.enqueue("feed.refresh_restaurants", {"restaurant_ids": list(by_restaurant)})
+    return orders
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_replica
+def order_history(request):
+    orders = Order.objects.filter(user=request.user).select_related("restaurant")
+    paginator = OrderCursorPagination()
+    page = paginator.paginate_queryset(orders, request)
+    # Delivered orders no longer change, so their payloads come from the cache;
+    # only the rest have their items prefetched and serialized.
+    cached = order_cache.get_many(page)
+    misses = [order for order in page if order.id not in cached]
+    prefetch_related_objects(misses, Prefetch("items", queryset=OrderItem.objects.select_related("menu_item")))
+    fresh = OrderHistorySerializer(misses, many=True).data
+    order_cache.set_many(fresh)
+    payloads = {**cached, **{payload["id"]: payload for payload in fresh}}
+    return paginator.get_paginated_response([payloads[order.id] for order in page])
+
+@api_view(['GET'])
+@role_required(["RESTAURANT_OWNER"])
+@read_replica
+def restaurant_orders(request):
+    # Filtering on the restaurant ids rather than joining lets an owner with one
+    # restaurant read the newest orders straight off order_restaurant_recent_idx
+    # (or order_restaurant_inbox_idx with a status). Orders of several restaurants
+    # still have to be merged with a sort.
+    restaurant_ids = list(Restaurant.objects.filter(owner=request.user).values_list("id", flat=True))
+    orders = (Order.objects.filter(restaurant_id__in=restaurant_ids)
+              .select_related("user")
+              .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("menu_item"))))
+    status = request.GET.get("status")
+    if status:
+        orders = orders.filter(status=status)
+    paginator = OrderCursorPagination()
+    page = paginator.paginate_queryset(orders, request)
+    return paginator.get_paginated_response(OrderSerializer(page, many=True).data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -188,6 +415,7 @@ def update_order_status(request, order_id):
         return Response({"error":"Invalid status update","allowed_next_status": WORKFLOW.get(order.status)}, status=400)
     order.status = new_status
     order.save()
+    order_cache.invalidate(order)
     return Response({"message":"Order status updated","order_id":order.id,"new_status":new_status})
 
 # --- RATINGS / REVIEWS ---
@@ -207,12 +435,14 @@ def rate_restaurant(request, restaurant_id):
     restaurant = get_object_or_404(Restaurant, id=restaurant_id)
     restaurant.rating = round(avg_rating,1)
     restaurant.save()
+    jobs.enqueue("feed.refresh_restaurants", {"restaurant_ids": [restaurant.id]})
     return Response({"message":"Review added" if created else "Review updated","rating": review.rating,"comment":review.comment,"average_rating":restaurant.rating})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_replica
 def restaurant_reviews(request, restaurant_id):
-    reviews = RatingReview.objects.filter(restaurant_id=restaurant_id).order_by('-created_at')
+    reviews = RatingReview.objects.filter(restaurant_id=restaurant_id).select_related("user").order_by('-created_at')
     serializer = RatingReviewSerializer(reviews, many=True)
     return Response(serializer.data)
 
@@ -220,6 +450,7 @@ def restaurant_reviews(request, restaurant_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @role_required(["ADMIN"])
+@read_replica
 def admin_list_users(request):
     serializer = UserSerializer(User.objects.all(), many=True)
     return Response(serializer.data)
@@ -227,6 +458,7 @@ def admin_list_users(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @role_required(["ADMIN"])
+@read_replica
 def admin_list_all_restaurants(request):
     serializer = RestaurantSerializer(Restaurant.objects.all(), many=True)
     return Response(serializer.data)
@@ -239,6 +471,8 @@ def admin_update_restaurants(request, restaurant_id):
     serializer = RestaurantSerializer(restaurant, data=request.data, partial=True)
     if serializer.is_valid():
         serializer.save()
+        # The category may have changed, so every feed could hold a stale entry.
+        feed.invalidate()
         return Response(serializer.data)
     return Response(serializer.errors)
 
@@ -248,18 +482,37 @@ def admin_update_restaurants(request, restaurant_id):
 def admin_delete_restaurants(request, restaurant_id):
     restaurant = get_object_or_404(Restaurant, id=restaurant_id)
     restaurant.delete()
+    menu_cache.invalidate_menu()
+    feed.invalidate([restaurant.category])
     return Response({"message":"Restaurant deleted"})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @role_required(["ADMIN"])
+@read_replica
 def admin_list_orders(request):
     data=[]
-    for order in Order.objects.all():
+    orders = Order.objects.select_related("user").prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("menu_item")))
+    for order in orders:
         items = [{"menu_item": i.menu_item.name,"quantity":i.quantity,"price":float(i.price)} for i in order.items.all()]
         data.append({"order_id": order.id,"user": order.user.username,"status":order.status,"total_amount":float(order.total_amount),"items":items,"created_at": order.created_at})
     return Response(data)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@role_required(["ADMIN"])
+def admin_list_profiles(request):
+    return Response(profiling.list_profiles())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@role_required(["ADMIN"])
+def admin_download_profile(request, name):
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404("No such profile")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=name, content_type="application/octet-stream")
+
 # --- DELIVERY ---
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -269,6 +522,7 @@ def delivery_accept_order(request, order_id):
     if order.status != "ACCEPTED":
         order.status = "PREPARING"
         order.save()
+        order_cache.invalidate(order)
         return Response({"message":f"Order {order.id} accepted for delivery","status":order.status})
     return Response({"error":"Order cannot be accepted"}, status=400)
 
@@ -283,6 +537,7 @@ def delivery_update_status(request, order_id):
         return Response({"error":"Invalid status"}, status=400)
     order.status = new_status
     order.save()
+    order_cache.invalidate(order)
     return Response({"message":f"Order {order.id} status updated","new_status":order.status})
 
 # --- PAYPAL ---
@@ -292,7 +547,7 @@ def create_paypal_payment(request, order_id):
     order = get_object_or_404(Order, id=order_id, user=request.user)
     if order.status!="DELIVERED":
         return Response({"error": f"Cannot pay for order with status {order.status}"}, status=400)
-    payment = paypalrestsdk.Payment({
+    payment = paypal().Payment({
         "intent":"sale",
         "payer":{"payment_method":"paypal"},
         "redirect_urls":{
@@ -314,10 +569,11 @@ def execute_paypal_payment(request, order_id):
     payment_id = request.GET.get('paymentId')
     payer_id = request.GET.get('PayerID')
     order = get_object_or_404(Order, id=order_id, user=request.user)
-    payment = paypalrestsdk.Payment.find(payment_id)
+    payment = paypal().Payment.find(payment_id)
     if payment.execute({"payer_id": payer_id}):
         order.status = "ACCEPTED"
         order.save()
+        order_cache.invalidate(order)
         return Response({"message":"Payment successful","order_id":order.id})
     else:
         return Response({"error":payment.error}, status=400)
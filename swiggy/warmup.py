@@ -0,0 +1,51 @@
+import inspect
+from django.db import connections
+from django.urls import get_resolver
+from rest_framework import serializers as drf_serializers
+
+
+def warm_imports():
+    # Importing the URLconf pulls in the views, serializers and models.
+    resolver = get_resolver()
+    resolver.url_patterns
+    return resolver
+
+def warm_urls(resolver):
+    # reverse_dict is built lazily on the first reverse()/resolve(); force it now.
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        if hasattr(pattern, "reverse_dict"):
+            pattern.reverse_dict
+
+def warm_serializers():
+    from . import serializers
+    count = 0
+    for _, cls in inspect.getmembers(serializers, inspect.isclass):
+        if issubclass(cls, drf_serializers.Serializer) and cls.__module__ == serializers.__name__:
+            # Building the fields populates the model _meta and field lookup caches.
+            cls().fields
+            count += 1
+    return count
+
+def warm_payments():
+    from .payments import paypal
+    paypal()
+
+def warm_connections():
+    for conn in connections.all():
+        conn.ensure_connection()
+
+def warmup(connect_db=True):
+    """Prime the lazy parts of the app so the first request in a worker is not slow.
+
+    Imports (including the lazily loaded PayPal SDK), URL resolvers and
+    serializer metadata are safe to warm in a preloading master process.
+    Database connections must not be shared across a fork, so open them per
+    worker with ``connect_db=True``.
+    """
+    resolver = warm_imports()
+    warm_urls(resolver)
+    warm_serializers()
+    warm_payments()
+    if connect_db:
+        warm_connections()